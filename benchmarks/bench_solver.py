@@ -0,0 +1,180 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# bench_solver.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+"""Times each stage of the symbolic pipeline on growing stacks and grids.
+
+Stages: Solver.bootstrap, Solver._extract_Zs, the substitutions done by
+lambdify (Solver._substitute), code generation/compilation and the kernel
+evaluation. Wall time, peak (Python-tracked) memory and expression sizes
+(count_ops) are recorded and saved as JSON.
+
+Usage:
+    python benchmarks/bench_solver.py -o results.json
+    python benchmarks/bench_solver.py --compare before.json after.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import tracemalloc
+
+import numpy as np
+import sympy as sp
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import symtmm  # noqa: E402
+from symtmm import Solver, Layer, Eqf, Air  # noqa: E402
+from symtmm.backing import rigid  # noqa: E402
+from symtmm.codegen import generate_source  # noqa: E402
+from symtmm.runtime import compile_source  # noqa: E402
+from tests.conftest import FOAM  # noqa: E402
+
+
+def make_solver(nb_layers):
+    """Alternating Eqf/Air stack (always ending with an Eqf layer)"""
+    solver = Solver(backing=rigid)
+    for i_L in range(nb_layers):
+        if (nb_layers-1-i_L) % 2 == 0:
+            medium = Eqf(solver.Gref)
+            medium.from_dict(FOAM)
+        else:
+            medium = Air(solver.Gref)
+        solver.layers.append(Layer(medium, 0.01*(1+i_L)))
+    return solver
+
+
+def measure(func, repeat=1):
+    """Best wall time over repeat runs, peak traced memory of the first run"""
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter()-t0)
+    return result, {'time': min(times), 'peak_memory': peak}
+
+
+def bench_stack(nb_layers, grids, repeat):
+    solver = make_solver(nb_layers)
+    omega, theta = solver.Gref['syms']['omega'], solver.Gref['syms']['theta']
+    params = [omega, theta]
+    record = {'nb_layers': nb_layers, 'stages': {}, 'evaluation': []}
+
+    # the solver memos would turn the repeated runs into lookups
+    def bootstrap():
+        solver._blocks_memo.clear()
+        solver.bootstrap(params, {})
+    _, record['stages']['bootstrap'] = measure(bootstrap, repeat)
+    record['matrix_shape'] = list(solver.system.shape)
+
+    def extract():
+        solver._sweep_memo.clear()
+        solver._extract_Zs()
+    _, record['stages']['extract_Zs'] = measure(extract, repeat)
+    record['stages']['extract_Zs']['count_ops'] = int(sp.count_ops(solver.Zs))
+
+    solver.check_complete()
+    Zs, record['stages']['substitute'] = measure(lambda: solver._substitute(params, {}), repeat)
+    record['stages']['substitute']['count_ops'] = int(sp.count_ops(Zs))
+
+    (source, stats), record['stages']['codegen'] = measure(lambda: generate_source('Zs', params, Zs), repeat)
+    record['stages']['codegen'].update(stats)
+    kernel, record['stages']['compile'] = measure(lambda: compile_source(source, 'Zs'), repeat)
+
+    for nb_freqs, nb_angles in grids:
+        om = 2*np.pi*np.logspace(1, 4, nb_freqs)[:, np.newaxis]
+        th = np.linspace(0, 1.5, nb_angles)[np.newaxis, :]
+        _, res = measure(lambda: kernel(om, th), repeat)
+        res.update({'nb_freqs': nb_freqs, 'nb_angles': nb_angles})
+        record['evaluation'].append(res)
+
+    return record
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    grids = [tuple(int(_) for _ in g.split('x')) for g in args.grids]
+    results = {
+        'symtmm_version': symtmm.__VERSION__,
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'sympy': sp.__version__,
+        'machine': platform.platform(),
+        'stacks': [],
+    }
+    for nb_layers in range(1, args.max_layers+1):
+        record = bench_stack(nb_layers, grids, args.repeat)
+        results['stacks'].append(record)
+        print(f'{nb_layers} layer(s): ' + ', '.join(
+            f'{k} {v["time"]:.3g}s' for k, v in record['stages'].items()
+        ))
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(results, fh, indent=2)
+
+
+def compare(before_path, after_path):
+    """Prints after/before time ratios for every stage and grid"""
+    with open(before_path) as fh:
+        before = {_['nb_layers']: _ for _ in json.load(fh)['stacks']}
+    with open(after_path) as fh:
+        after = {_['nb_layers']: _ for _ in json.load(fh)['stacks']}
+    for nb_layers in sorted(set(before) & set(after)):
+        b, a = before[nb_layers], after[nb_layers]
+        ratios = [f'{k} x{a["stages"][k]["time"]/b["stages"][k]["time"]:.2f}' for k in a['stages'] if k in b['stages']]
+        for eb, ea in zip(b['evaluation'], a['evaluation']):
+            ratios.append(f'eval {ea["nb_freqs"]}x{ea["nb_angles"]} x{ea["time"]/eb["time"]:.2f}')
+        print(f'{nb_layers} layer(s): ' + ', '.join(ratios))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max-layers', type=int, default=4)
+    parser.add_argument('--grids', nargs='+', default=['100x1', '1000x10', '10000x30'],
+                        help='evaluation grids, as <nb frequencies>x<nb angles>')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('-o', '--output', help='JSON file the results are written to')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'),
+                        help='compare two result files instead of running')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+    else:
+        run(args)
@@ -1,5 +1,36 @@
 __VERSION__ = '0.0'
 
-from symtmm.solver import Solver
-from symtmm.layers import Layer
-from symtmm.media import Air, Eqf
+import sys
+import importlib
+
+
+# the symbolic machinery (and SymPy) is only imported when accessed, so that
+# evaluation workers can use symtmm.runtime with NumPy alone
+_LAZY_ATTRIBUTES = {
+    'Solver': 'symtmm.solver',
+    'NumericSolver': 'symtmm.numeric',
+    'KernelCache': 'symtmm.cache',
+    'Layer': 'symtmm.layers',
+    'Air': 'symtmm.media',
+    'Eqf': 'symtmm.media',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + list(_LAZY_ATTRIBUTES.keys()))
+
+
+# module __getattr__ (PEP 562) needs Python 3.7, the attributes are imported
+# eagerly on older versions
+if sys.version_info < (3, 7):
+    for _name in _LAZY_ATTRIBUTES:
+        __getattr__(_name)
+    del _name
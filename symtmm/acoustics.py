@@ -0,0 +1,60 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# acoustics.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+import numpy as np
+
+
+def reflection_coefficient(Zs, Z, theta=0.):
+    """Plane wave reflection coefficient of a surface of impedance Zs
+
+    Z -- characteristic impedance of the incident (saturating) medium
+    theta -- angle of incidence [rad]
+    """
+    Zs_cos = Zs*np.cos(theta)
+    return (Zs_cos-Z)/(Zs_cos+Z)
+
+
+def absorption(Zs, Z, theta=0.):
+    return 1-np.abs(reflection_coefficient(Zs, Z, theta))**2
+
+
+def paris_quadrature(nodes=8, theta_max=np.pi/2):
+    """Gauss-Legendre nodes and weights for the Paris formula
+
+    The diffuse field absorption is the sin(2 theta) weighted mean of the
+    absorption over [0, theta_max]:
+        alpha_d = int(alpha(theta) sin(2 theta)) / int(sin(2 theta))
+    so that alpha_d = sum(weights*alpha(thetas)).
+    """
+    x, w = np.polynomial.legendre.leggauss(nodes)
+    thetas = theta_max*(x+1)/2
+    weights = w*np.sin(2*thetas)
+    return thetas, weights/np.sum(weights)
+
+
+def diffuse_absorption(Zs_theta, Z, nodes=8, theta_max=np.pi/2):
+    """Diffuse field absorption from a function of the angle of incidence
+
+    Zs_theta -- callable returning Zs for an array of angles (the angles are
+                given along a trailing axis, the result must broadcast with it)
+    """
+    thetas, weights = paris_quadrature(nodes, theta_max)
+    return np.sum(absorption(Zs_theta(thetas), Z, thetas)*weights, axis=-1)
@@ -0,0 +1,186 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# batch.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+import re
+import time
+import signal
+import traceback
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from symtmm.runtime import Kernel
+
+
+class CompileTimeout(BaseException):
+    """Raised in a worker when a compilation exceeds its time limit
+
+    Derives from BaseException so that the broad 'except Exception' blocks
+    of SymPy do not swallow it.
+    """
+
+
+def _raise_timeout(signum, frame):
+    raise CompileTimeout('Compilation timed out')
+
+
+def build_solver(definition):
+    """Builds a Solver from a plain-data stack definition
+
+    definition -- dict with
+        'layers': list of {'medium': {'medium_type': ..., <parameters>}, 'thickness': float}
+                  from the front to the backing
+        'backing': a function of symtmm.backing, or its name (default 'rigid')
+        'saturating_medium': optional medium definition (default: Air)
+    """
+    import symtmm.backing
+    from symtmm.solver import Solver
+    from symtmm.layers import Layer
+    from symtmm.media import medium_from_dict
+
+    backing = definition.get('backing', 'rigid')
+    if isinstance(backing, str):
+        backing = getattr(symtmm.backing, backing)
+    solver = Solver(backing=backing)
+    if definition.get('saturating_medium') is not None:
+        solver.sat_med = medium_from_dict(solver.Gref, definition['saturating_medium'])
+        solver.Gref['sat'] = solver.sat_med
+    for L in definition['layers']:
+        solver.layers.append(Layer(medium_from_dict(solver.Gref, L['medium']), L['thickness']))
+    return solver
+
+
+def resolve_params(solver, names):
+    """Symbols corresponding to parameter names
+
+    Names are either global ones ('omega', 'theta'), medium parameters or
+    'layers[<i>].thickness' (same convention as stack_description).
+    """
+    symbols = dict(solver.Gref['syms'])
+    for L in solver.layers:
+        symbols.update({str(k): v for k, v in L.medium.syms.items()})
+    params = []
+    for name in names:
+        thickness = re.fullmatch(r'layers\[(\d+)\]\.thickness', name)
+        if thickness is not None:
+            params.append(solver.layers[int(thickness.group(1))].thickness)
+        elif name in symbols:
+            params.append(symbols[name])
+        else:
+            raise KeyError(f'Unknown parameter "{name}"')
+    return params
+
+
+def compile_stack(definition, timeout=None, **lambdify_options):
+    """Compiles a stack definition, returns the kernel as a dict (see Kernel.to_dict)
+
+    Besides the stack (see build_solver), the definition holds the 'params'
+    names (see resolve_params), the 'Gref_values' and an optional 'jacobian'
+    (subset of params). Only plain data goes in and out, so that this can run
+    in a worker process.
+    """
+
+    if timeout is not None:
+        previous = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        solver = build_solver(definition)
+        params = resolve_params(solver, definition['params'])
+        jacobian = resolve_params(solver, definition.get('jacobian', []))
+        solver.lambdify(params, definition.get('Gref_values', {}), jacobian=jacobian or None, **lambdify_options)
+    finally:
+        if timeout is not None:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+    kernel = solver.export_kernel().to_dict()
+    kernel['params'] = list(definition['params'])
+    kernel['metadata']['profile'] = solver.profiler.summary()
+    if jacobian:
+        kernel['metadata']['jacobian_source'] = solver.Zs_jac_source
+    return kernel
+
+
+def _compile_job(definition, timeout, lambdify_options):
+    t0 = time.perf_counter()
+    try:
+        return compile_stack(definition, timeout, **lambdify_options), None, time.perf_counter()-t0
+    except (Exception, CompileTimeout) as e:
+        return None, f'{e.__class__.__name__}: {e}\n{traceback.format_exc()}', time.perf_counter()-t0
+
+
+class CompileResult(object):
+    """Outcome of the compilation of one stack by compile_stacks"""
+
+    def __init__(self, definition, kernel, error, time):
+        self.definition = definition
+        self.kernel = kernel  # Kernel, or None on failure
+        self.error = error  # formatted exception, or None on success
+        self.time = time
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def compile_stacks(definitions, max_workers=None, timeout=None, executor=None, **lambdify_options):
+    """Compiles many stack definitions (see compile_stack) in a process pool
+
+    The symbolic pipeline is pure Python, stacks are therefore compiled in
+    separate processes and the generated sources are sent back.
+
+    timeout -- optional per-stack time limit (in seconds), enforced in the
+               workers with SIGALRM so that they stay usable (POSIX only);
+               a job stuck in C code (e.g. a NumPy/BLAS call) is only
+               interrupted once it returns to the interpreter
+    executor -- optional ProcessPoolExecutor to use instead of a new one
+    lambdify_options -- forwarded to Solver.lambdify (cse, cache, ...)
+
+    Returns one CompileResult per definition, in order. Failures (including
+    timeouts and crashed workers) are reported in the results, without
+    stopping the other compilations.
+    """
+
+    definitions = list(definitions)
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers)
+    results = [None]*len(definitions)
+    try:
+        futures = {
+            executor.submit(_compile_job, d, timeout, lambdify_options): i_d
+            for i_d, d in enumerate(definitions)
+        }
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for f in done:
+                i_d = futures[f]
+                try:
+                    kernel, error, elapsed = f.result()
+                except Exception as e:
+                    # the worker itself died (e.g. BrokenProcessPool)
+                    kernel, error, elapsed = None, f'{e.__class__.__name__}: {e}', None
+                results[i_d] = CompileResult(
+                    definitions[i_d], Kernel.from_dict(kernel) if kernel is not None else None, error, elapsed
+                )
+    finally:
+        if own_executor:
+            executor.shutdown()
+    return results
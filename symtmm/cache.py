@@ -0,0 +1,151 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# cache.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+import os
+import json
+import hashlib
+import tempfile
+
+
+# version of the generated kernels and of their metadata, to be bumped whenever
+# either changes so that older entries are no longer served
+#   2 -- values folded before the elimination
+#   3 -- optional mpmath source in the metadata
+#   4 -- thickness arguments named after the layer position (d_<i>)
+CACHE_FORMAT = 4
+
+
+def _medium_description(medium, params):
+    """Medium type and values, but for the parameters that are kernel arguments"""
+    return {
+        'class': f'{medium.__class__.__module__}.{medium.__class__.__qualname__}',
+        'type': medium.MEDIUM_TYPE,
+        'model': medium.MODEL,
+        'values': {k: repr(v) for k, v in medium.V.items() if medium.syms.get(k) not in params},
+    }
+
+
+def stack_description(solver, params, Gref_values, **options):
+    """Canonical (JSON-serialisable) description of what a compiled kernel depends on"""
+    import symtmm
+
+    # thickness symbols are unique per Layer instance, they are identified by
+    # the position of their layer instead
+    thickness_names = {L.thickness: f'layers[{i_L}].thickness' for i_L, L in enumerate(solver.layers)}
+
+    return {
+        'version': symtmm.__VERSION__,
+        'format': CACHE_FORMAT,
+        'saturating_medium': _medium_description(solver.sat_med, params),
+        'layers': [{
+            'medium': _medium_description(L.medium, params),
+            'thickness': None if L.thickness in params else repr(L.V_thickness),
+        } for L in solver.layers],
+        'backing': f'{solver.backing.__module__}.{solver.backing.__qualname__}',
+        'params': [thickness_names.get(_, str(_)) for _ in params],
+        'Gref_values': {str(k): repr(v) for k, v in Gref_values.items()},
+        'options': {k: repr(v) for k, v in options.items()},
+    }
+
+
+class KernelCache(object):
+    """Content-addressed on-disk cache of generated Zs kernels
+
+    Each entry is stored as a <key>.py file (the generated source) and a
+    <key>.json file (metadata). The least recently used entries are evicted
+    once the total size goes over max_size (in bytes).
+    """
+
+    def __init__(self, directory=None, max_size=64*2**20):
+        if directory is None:
+            directory = os.environ.get(
+                'SYMTMM_CACHE_DIR',
+                os.path.join(os.path.expanduser('~'), '.cache', 'symtmm')
+            )
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def key(description):
+        serialized = json.dumps(description, sort_keys=True)
+        return hashlib.sha256(serialized.encode('utf8')).hexdigest()
+
+    def _path(self, key, ext):
+        return os.path.join(self.directory, f'{key}.{ext}')
+
+    def get(self, key):
+        """Returns a (source, metadata) tuple or None on a miss"""
+        try:
+            with open(self._path(key, 'py'), 'r') as fh:
+                source = fh.read()
+            with open(self._path(key, 'json'), 'r') as fh:
+                metadata = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        os.utime(self._path(key, 'py'))
+        return source, metadata
+
+    def put(self, key, source, metadata):
+        for ext, content in (('json', json.dumps(metadata, sort_keys=True)), ('py', source)):
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w') as fh:
+                fh.write(content)
+            os.replace(tmp_path, self._path(key, ext))
+        self.evict()
+
+    def invalidate(self, key=None):
+        """Removes the given entry, or every entry if key is None"""
+        keys = [key] if key is not None else self.keys()
+        for k in keys:
+            for ext in ('py', 'json'):
+                try:
+                    os.remove(self._path(k, ext))
+                except FileNotFoundError:
+                    pass
+
+    def keys(self):
+        return [_[:-3] for _ in os.listdir(self.directory) if _.endswith('.py')]
+
+    def size(self):
+        return sum(
+            os.path.getsize(os.path.join(self.directory, _))
+            for _ in os.listdir(self.directory) if _.endswith(('.py', '.json'))
+        )
+
+    def evict(self):
+        """Drops least recently used entries until the cache fits in max_size"""
+        entries = []
+        for k in self.keys():
+            try:
+                entries.append((os.path.getmtime(self._path(k, 'py')), k))
+            except FileNotFoundError:
+                pass
+        entries.sort()
+        total = self.size()
+        while total > self.max_size and entries:
+            _, k = entries.pop(0)
+            freed = sum(
+                os.path.getsize(self._path(k, ext))
+                for ext in ('py', 'json') if os.path.exists(self._path(k, ext))
+            )
+            self.invalidate(k)
+            total -= freed
@@ -0,0 +1,209 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# catalog.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+import os
+import json
+
+import yaml
+import numpy as np
+
+from symtmm.media import medium_from_dict
+from symtmm.utils import LRUCache
+
+
+INDEX_VERSION = 2
+
+# libyaml bindings are much faster, when available
+_Loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+def _documents(path):
+    """Yields the (offset, length) in bytes of each YAML document of a file
+
+    Boundaries are taken from the document start/end events of the pure Python
+    parser (whose marks count characters, whatever the libyaml version), so
+    that markers carrying a comment or a tag ('--- # foam', '--- !!map') and
+    explicit document ends ('...') are handled as YAML does.
+    """
+    with open(path, 'rb') as fh:
+        text = fh.read().decode('utf-8')
+
+    position, offset = 0, 0
+
+    def to_bytes(index):
+        # marks only move forward, convert the characters seen since the last one
+        nonlocal position, offset
+        offset += len(text[position:index].encode('utf-8'))
+        position = index
+        return offset
+
+    start = 0
+    for event in yaml.parse(text, Loader=yaml.SafeLoader):
+        if isinstance(event, yaml.DocumentStartEvent):
+            start = to_bytes(event.end_mark.index)
+        elif isinstance(event, yaml.DocumentEndEvent):
+            end = to_bytes(event.start_mark.index)
+            if end > start:
+                yield start, end-start
+
+
+def _numerical(record):
+    """Numerical parameters of a record (YAML 1.1 reads '1e-6' as a string)"""
+    values = {}
+    for k, v in record.items():
+        if isinstance(v, bool) or not isinstance(v, (int, float, str)):
+            continue
+        try:
+            values[k] = float(v)
+        except ValueError:
+            pass
+    return values
+
+
+class MaterialCatalog(object):
+    """Indexed collection of material definitions stored in YAML files
+
+    Each (possibly multi-document) file holds one material per document, as a
+    mapping with a 'name', a 'medium_type' (MEDIUM_TYPE of the medium class,
+    e.g. 'eqf' or 'fluid') and the parameters expected by Medium.from_dict.
+
+    An index (name, type, byte range and numerical parameters of each
+    document) is built once per file and saved next to it (or in index_dir)
+    as <file>.index.json; it is rebuilt when the file changes. Full records
+    are only parsed when accessed, column arrays are read from the index.
+    """
+
+    def __init__(self, paths, index_dir=None, cache_size=1024):
+        self.paths = [paths] if isinstance(paths, str) else list(paths)
+        self.index_dir = index_dir
+        self.entries = {}
+        self._records = LRUCache(cache_size)
+        for path in self.paths:
+            for entry in self._load_index(path):
+                if entry['name'] in self.entries:
+                    raise ValueError(f'Duplicate material name "{entry["name"]}"')
+                self.entries[entry['name']] = entry
+
+    def _index_path(self, path):
+        index_dir = self.index_dir if self.index_dir is not None else os.path.dirname(os.path.abspath(path))
+        return os.path.join(index_dir, os.path.basename(path)+'.index.json')
+
+    def _load_index(self, path):
+        stat = os.stat(path)
+        signature = {'version': INDEX_VERSION, 'size': stat.st_size, 'mtime': stat.st_mtime}
+        index_path = self._index_path(path)
+        try:
+            with open(index_path, 'r') as fh:
+                index = json.load(fh)
+            if index['signature'] == signature:
+                return index['entries']
+        except (OSError, ValueError, KeyError):
+            pass
+
+        entries = []
+        with open(path, 'rb') as fh:
+            for offset, length in _documents(path):
+                fh.seek(offset)
+                record = yaml.load(fh.read(length), Loader=_Loader)
+                if not isinstance(record, dict):
+                    continue
+                entries.append({
+                    'name': str(record.get('name')),
+                    'medium_type': record.get('medium_type'),
+                    'path': os.path.abspath(path),
+                    'offset': offset,
+                    'length': length,
+                    # numerical parameters, so that columns do not need the records
+                    'values': _numerical(record),
+                })
+        try:
+            with open(index_path, 'w') as fh:
+                json.dump({'signature': signature, 'entries': entries}, fh)
+        except OSError:
+            # read-only location, the index is rebuilt next time
+            pass
+        return entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def names(self, medium_type=None):
+        return [k for k, v in self.entries.items() if medium_type is None or v['medium_type'] == medium_type]
+
+    def record(self, name):
+        """Parameters of the given material (as a dict), parsed on first access"""
+        record = self._records.get(name)
+        if record is None:
+            entry = self.entries[name]
+            with open(entry['path'], 'rb') as fh:
+                fh.seek(entry['offset'])
+                record = yaml.load(fh.read(entry['length']), Loader=_Loader)
+            self._records.put(name, record)
+        return record
+
+    def medium(self, name, global_refs):
+        """Builds the medium object of the given material"""
+        return medium_from_dict(global_refs, self.record(name))
+
+    def columns(self, params, names=None, medium_type=None):
+        """Parameters of many materials as column arrays
+
+        params -- names of the parameters to extract
+        names -- materials to include (default: all, or all of medium_type)
+
+        Returns a (names, {param: array}) tuple, arrays following names' order.
+        """
+        names = list(names) if names is not None else self.names(medium_type)
+        columns = {p: np.empty(len(names)) for p in params}
+        for i_n, name in enumerate(names):
+            values = self.entries[name]['values']
+            for p in params:
+                if p not in values:
+                    raise LookupError(f'Unable to find definition of parameter "{p}" for "{name}"')
+                columns[p][i_n] = values[p]
+        return names, columns
+
+    def screen(self, solver, values, names=None, medium_type=None):
+        """Evaluates a compiled Zs for many materials in a single call
+
+        Every parameter of the compiled function (see Solver.lambdify) named
+        after a catalog parameter takes the values of the screened materials
+        along a new leading axis; the other ones must be given in values
+        ({parameter name: value}).
+
+        Returns a (names, Zs) tuple with Zs of shape (len(names),)+values' shape.
+        """
+        values = {str(k): np.asarray(v) for k, v in values.items()}
+        kernel_params = [str(_) for _ in solver.params]
+        from_catalog = [_ for _ in kernel_params if _ not in values]
+        names, columns = self.columns(from_catalog, names, medium_type)
+
+        shape = np.broadcast(*values.values()).shape if values else ()
+        args = []
+        for p in kernel_params:
+            if p in columns:
+                args.append(columns[p].reshape((-1,)+(1,)*len(shape)))
+            else:
+                args.append(values[p][np.newaxis, ...])
+        return names, np.broadcast_to(solver.Zs_func(*args), (len(names),)+shape)
@@ -0,0 +1,176 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# codegen.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+import keyword
+
+import sympy as sp
+from sympy.printing.lambdarepr import NumPyPrinter, MpmathPrinter
+
+
+# printers usable for the generated code, with the module their output uses
+PRINTERS = {
+    'numpy': (NumPyPrinter, 'numpy'),
+    'mpmath': (MpmathPrinter, 'mpmath'),
+}
+
+
+def _arg_names(args):
+    """Python identifiers to be used for the given symbols"""
+    names = []
+    for i_a, a in enumerate(args):
+        name = str(a)
+        if not name.isidentifier() or keyword.iskeyword(name) or name in names:
+            name = f'arg_{i_a}'
+        names.append(name)
+    return names
+
+
+def _generate(name, args, exprs, cse, format_return, printer='numpy', extra_args=()):
+    """Shared code generation: CSE, printing and function layout
+
+    format_return receives the reduced expressions and the function printing
+    them, and returns the list of the final statements of the function
+    (ending with the return).
+    extra_args are appended as is to the signature (e.g. keyword arguments).
+    """
+
+    if printer not in PRINTERS:
+        raise ValueError(f'Unknown printer "{printer}"')
+    printer_class, module = PRINTERS[printer]
+
+    arg_names = _arg_names(args)
+    safe_args = {a: sp.Symbol(n) for a, n in zip(args, arg_names) if str(a) != n}
+    exprs = [sp.sympify(_).xreplace(safe_args) for _ in exprs]
+
+    stats = {'ops_before': sum(sp.count_ops(_) for _ in exprs)}
+    if cse:
+        replacements, exprs = sp.cse(exprs, symbols=sp.numbered_symbols('_x'))
+    else:
+        replacements = []
+    stats['ops_after'] = sum(sp.count_ops(_) for _ in exprs) \
+        + sum(sp.count_ops(r) for _, r in replacements)
+    stats['temporaries'] = len(replacements)
+
+    printer = printer_class()
+    lines = [
+        f'import {module}',
+        '',
+        '',
+        f'def {name}({", ".join(arg_names+list(extra_args))}):',
+    ]
+    for tmp, expr in replacements:
+        lines.append(f'    {tmp} = {printer.doprint(expr)}')
+    lines.extend(f'    {_}' for _ in format_return(exprs, printer.doprint))
+
+    return '\n'.join(lines) + '\n', stats
+
+
+def generate_source(name, args, exprs, cse=True, printer='numpy'):
+    """Generates the source of a NumPy function evaluating exprs
+
+    name -- name of the generated function
+    args -- list of symbols, turned into the function arguments
+    exprs -- expression or list of expressions (the function then returns a tuple)
+    cse -- if True, common subexpressions are computed once and stored in
+           temporaries
+    printer -- 'numpy' (vectorized function) or 'mpmath' (scalar function
+               evaluated in arbitrary precision, see symtmm.runtime.precision)
+
+    Returns a (source, stats) tuple where stats holds the operation counts
+    before and after the elimination.
+    """
+
+    if not isinstance(exprs, (list, tuple)):
+        return _generate(name, args, [exprs], cse, lambda e, p: [f'return {p(e[0])}'], printer)
+    return _generate(name, args, exprs, cse, lambda e, p: [f'return ({", ".join(map(p, e))},)'], printer)
+
+
+def generate_jacobian_source(name, args, expr, wrt, cse=True):
+    """Generates a function returning expr and its derivatives w.r.t. wrt
+
+    The value and the derivatives share their subexpressions. The generated
+    function returns a (value, jacobian) tuple, the derivatives being
+    stacked along the last axis of jacobian.
+    """
+
+    expr = sp.sympify(expr)
+    exprs = [expr] + [sp.diff(expr, _) for _ in wrt]
+
+    def format_return(e, p):
+        r = [p(_) for _ in e]
+        return [
+            f'_value = {r[0]}',
+            f'_jacobian = numpy.broadcast_arrays(_value, {", ".join(r[1:])})[1:]',
+            'return (_value, numpy.stack(_jacobian, axis=-1))',
+        ]
+
+    return _generate(name, args, exprs, cse, format_return)
+
+
+# functions whose NumPy counterpart is a ufunc of the same name
+_UFUNCS = ('exp', 'log', 'sin', 'cos', 'tan', 'sinh', 'cosh', 'tanh', 'conjugate')
+
+
+def _ufunc_statement(expr, doprint, out):
+    """Statement evaluating expr into out, its last operation writing there directly"""
+
+    if expr.is_Add or expr.is_Mul:
+        rest = list(expr.args)
+        inverses = [_ for _ in rest if _.is_Pow and _.exp == -1]
+        if expr.is_Mul and inverses:
+            rest.remove(inverses[0])
+            ufunc, last = 'divide', inverses[0].base
+        elif expr.is_Add and rest[-1].could_extract_minus_sign():
+            ufunc, last = 'subtract', -rest.pop()
+        else:
+            ufunc, last = 'add' if expr.is_Add else 'multiply', rest.pop()
+        return f'numpy.{ufunc}({doprint(expr.func(*rest))}, {doprint(last)}, out={out})'
+    if expr.is_Pow:
+        if expr.exp == -1:
+            return f'numpy.divide(1.0, {doprint(expr.base)}, out={out})'
+        if expr.exp == sp.S.Half:
+            return f'numpy.sqrt({doprint(expr.base)}, out={out})'
+        return f'numpy.power({doprint(expr.base)}, {doprint(expr.exp)}, out={out})'
+    if expr.is_Function and expr.func.__name__ in _UFUNCS and len(expr.args) == 1:
+        return f'numpy.{expr.func.__name__}({doprint(expr.args[0])}, out={out})'
+    return f'numpy.copyto({out}, {doprint(expr)})'
+
+
+def generate_outputs_source(name, args, exprs, cse=True):
+    """Generates a function evaluating several outputs with shared subexpressions
+
+    The generated function takes an extra optional out argument: a sequence
+    of arrays (one per output) the results are written to, which are then
+    returned instead of new arrays. The last operation of every output (a
+    NumPy ufunc called with out=) writes to these arrays directly, the other
+    ones (and the shared subexpressions) still use temporaries.
+    """
+
+    def format_return(e, p):
+        lines = [
+            'if out is None:',
+            f'    return ({", ".join(map(p, e))},)',
+        ]
+        lines.extend(_ufunc_statement(expr, p, f'out[{i_e}]') for i_e, expr in enumerate(e))
+        lines.append('return tuple(out)')
+        return lines
+
+    return _generate(name, args, exprs, cse, format_return, extra_args=['out=None'])
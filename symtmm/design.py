@@ -0,0 +1,176 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# design.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+import heapq
+import itertools
+
+import numpy as np
+
+from symtmm.layers.utils import SV_LENGTH
+from symtmm.interfaces.utils import generic_interface
+from symtmm.numeric import generic_layer, to_array, null_space, stack_saturating_medium
+from symtmm.acoustics import absorption, paris_quadrature
+
+
+class DesignResult(object):
+    """Outcome of DesignExplorer.search"""
+
+    def __init__(self, stack, thickness, absorption, stats):
+        self.stack = stack  # option names, from the front (incident side) to the backing
+        self.thickness = thickness
+        self.absorption = absorption
+        self.stats = stats
+
+
+class DesignExplorer(object):
+    """Evaluates many candidate stacks built from a set of layer options
+
+    Stacks are organized in a prefix tree rooted at the backing: the
+    admissible states at the top of every sub-stack (over the whole
+    frequency/angle grid) are computed once and shared by all the stacks
+    having this sub-stack next to their backing. The transfer matrix of each
+    layer option is also computed once, so that extending a sub-stack by one
+    layer costs a single batched 2x2 product.
+
+    options -- {name: Layer}, the possible layers
+    omega -- circular frequencies
+    theta -- angle(s) of incidence, broadcast against omega, or 'diffuse'
+             (Paris formula, over nodes angles)
+    saturating_medium -- defaults to the one the media of the options were
+                         defined with (see numeric.stack_saturating_medium)
+    """
+
+    def __init__(self, options, backing, omega, theta=0., saturating_medium=None, nodes=8):
+        self.options = dict(options)
+        self.backing = backing
+        self.sat_med = stack_saturating_medium([L.medium for L in self.options.values()], saturating_medium)
+
+        self.omega = np.asarray(omega, dtype=float)
+        if isinstance(theta, str) and theta == 'diffuse':
+            thetas, self.weights = paris_quadrature(nodes)
+            self.omega = self.omega[..., np.newaxis]
+            self.theta = thetas
+        else:
+            self.theta, self.weights = np.asarray(theta, dtype=float), None
+        self.k_x = self.omega/self.sat_med.V['c']*np.sin(self.theta)
+
+        self._transfers = {}  # option name -> layer transfer matrix
+        self._interfaces = {}  # (left, right) classes -> interface transfer
+        self._states = {}  # sub-stack (from the backing) -> admissible states
+        self.stats = {'layer_matrices': 0, 'products': 0}
+
+    def _transfer(self, name):
+        if name not in self._transfers:
+            L = self.options[name]
+            self._transfers[name] = generic_layer(L.medium)(self.omega, self.k_x, L.medium, L.V_thickness)
+            self.stats['layer_matrices'] += 1
+        return self._transfers[name]
+
+    def _interface(self, medium_left, medium_right):
+        """ -I^-1 J, the matrix mapping the right state to the left one """
+        key = (medium_left.__class__, medium_left.MODEL, medium_right.__class__, medium_right.MODEL)
+        if key not in self._interfaces:
+            I, J = map(to_array, generic_interface(medium_left, medium_right)())
+            self._interfaces[key] = -np.linalg.solve(I, J)
+        return self._interfaces[key]
+
+    def _state(self, substack):
+        """Admissible states at the top of a sub-stack (option names, from the backing)"""
+        state = self._states.get(substack)
+        if state is not None:
+            return state
+
+        top = self.options[substack[-1]]
+        if len(substack) == 1:
+            S = null_space(to_array(self.backing(top.medium)))
+            if S.shape != (SV_LENGTH[top.medium.MODEL], SV_LENGTH[top.medium.MODEL]//2):
+                raise ValueError('The backing does not leave a valid set of admissible states')
+            state = self._transfer(substack[-1]) @ S
+        else:
+            below = self.options[substack[-2]]
+            state = self._transfer(substack[-1]) @ (self._interface(top.medium, below.medium) @ self._state(substack[:-1]))
+        self.stats['products'] += 1
+        self._states[substack] = state
+        return state
+
+    def absorption(self, stack):
+        """Absorption of a stack (option names, from the front to the backing)
+
+        Returns an array of omega's shape (averaged over the angles with the
+        'diffuse' incidence).
+        """
+        substack = tuple(reversed(stack))
+        state = self._interface(self.sat_med, self.options[substack[-1]].medium) @ self._state(substack)
+        alpha = absorption(state[..., 0, 0]/state[..., 1, 0], self.sat_med.V['Z'], self.theta)
+        if self.weights is not None:
+            alpha = np.sum(alpha*self.weights, axis=-1)
+        return alpha
+
+    def evaluate(self, stacks):
+        """Absorption of many stacks, as a {stack (tuple): absorption} dict"""
+        return {tuple(s): self.absorption(s) for s in stacks}
+
+    def thickness(self, stack):
+        return sum(self.options[_].V_thickness for _ in stack)
+
+    def search(self, target, max_layers=4, max_thickness=np.inf, allow_repeats=False):
+        """Thinnest stack whose absorption reaches target at every frequency
+
+        target -- minimum absorption, scalar or array of omega's shape
+        max_layers -- maximum number of layers of the candidates
+        max_thickness -- candidates thicker than this are not considered
+        allow_repeats -- if False, two adjacent layers cannot use the same option
+
+        Sub-stacks are explored by increasing total thickness (from the
+        backing): as adding layers only increases the thickness, the first
+        stack meeting the target is the thinnest one, and every candidate
+        thicker than it is pruned without being evaluated.
+
+        Returns a DesignResult (its stack being None if no candidate meets
+        the target).
+        """
+
+        target = np.asarray(target, dtype=float)
+        counter = itertools.count()  # tie-breaker, keeps the heap ordering stable
+        heap = [(self.options[n].V_thickness, next(counter), (n,)) for n in self.options]
+        heapq.heapify(heap)
+        stats = {'candidates': 0, 'pruned': 0}
+
+        while heap:
+            thickness, _, substack = heapq.heappop(heap)
+            if thickness > max_thickness:
+                stats['pruned'] += len(heap)+1
+                break
+            stats['candidates'] += 1
+            stack = tuple(reversed(substack))
+            alpha = self.absorption(stack)
+            if np.all(alpha >= target):
+                stats['pruned'] += len(heap)
+                stats.update(self.stats)
+                return DesignResult(stack, thickness, alpha, stats)
+            if len(substack) < max_layers:
+                for n, L in self.options.items():
+                    if not allow_repeats and n == substack[-1]:
+                        continue
+                    heapq.heappush(heap, (thickness+L.V_thickness, next(counter), substack+(n,)))
+
+        stats.update(self.stats)
+        return DesignResult(None, None, None, stats)
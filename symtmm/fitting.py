@@ -0,0 +1,241 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# fitting.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+import os
+
+import numpy as np
+
+from symtmm.runtime import cached_kernel
+from symtmm.acoustics import reflection_coefficient
+
+
+def _to_params(u, log_bounds):
+    """Maps unbounded variables to parameters within log-scaled bounds"""
+    log_lo, log_hi = log_bounds
+    s = (1+np.tanh(u/2))/2
+    p = np.exp(log_lo+(log_hi-log_lo)*s)
+    return p, p*(log_hi-log_lo)*s*(1-s)
+
+
+def _from_params(p, log_bounds):
+    log_lo, log_hi = log_bounds
+    s = (np.log(p)-log_lo)/(log_hi-log_lo)
+    s = np.clip(s, 1e-6, 1-1e-6)
+    return np.log(s/(1-s))
+
+
+def _residuals(kernel, omega, measured, target, Z, theta, log_bounds, u):
+    """Residuals of a batch of problems and their Jacobian w.r.t. the unbounded variables
+
+    measured -- (n, n_omega) measurements of the n problems, u -- (n, n_params)
+
+    Returns r (n, m) and J (n, m, n_params), with m = 2*n_omega for the Zs
+    target (real and imaginary parts) and n_omega for absorption.
+    """
+    p, dp_du = _to_params(u, log_bounds)
+    Zs, dZs = kernel(omega, *[p[:, [k]] for k in range(p.shape[1])])
+    dZs = dZs*dp_du[:, np.newaxis, :]
+    if target == 'Zs':
+        scale = np.abs(measured)[..., np.newaxis]
+        r = (Zs-measured)/scale[..., 0]
+        return (
+            np.concatenate([r.real, r.imag], axis=1),
+            np.concatenate([dZs.real/scale, dZs.imag/scale], axis=1)
+        )
+    elif target == 'absorption':
+        R = reflection_coefficient(Zs, Z, theta)
+        dR_dZs = 2*Z*np.cos(theta)/(Zs*np.cos(theta)+Z)**2
+        r = 1-np.abs(R)**2-measured
+        # d|R|^2/dp = 2 Re(conj(R) dR/dp)
+        return r, -2*np.real((np.conj(R)*dR_dZs)[..., np.newaxis]*dZs)
+    else:
+        raise ValueError(f'Unknown fitting target "{target}"')
+
+
+def fit_samples(source, omega, measured, target, Z, theta, log_bounds, u0, max_iter=100, tol=1e-10):
+    """Vectorized Levenberg-Marquardt over a batch of independent problems
+
+    source -- generated Jacobian kernel (see generate_jacobian_source), its
+              arguments being omega then the fitted parameters
+    measured -- (n, n_omega) measured Zs (complex) or absorption (real)
+    target -- 'Zs' or 'absorption'
+    u0 -- (n, n_params) starting points, in the unbounded variables
+
+    Returns the fitted parameters, the final costs, the number of iterations,
+    the convergence flags (relative cost decrease or relative step below tol)
+    and the stall flags (no decrease found, with steps still above tol, even
+    with a damping above 1e12), one per problem.
+    Problems that reached max_iter are neither converged nor stalled.
+    """
+
+    kernel = cached_kernel(source, 'Zs_jac')
+    omega = np.asarray(omega, dtype=float)[np.newaxis, :]
+
+    def residuals(u, idx):
+        return _residuals(kernel, omega, measured[idx], target, Z, theta, log_bounds, u)
+
+    n, n_params = u0.shape
+    u = u0.copy()
+    r, J = residuals(u, np.arange(n))
+    cost = np.sum(r**2, axis=1)
+    damping = np.full(n, 1e-3)
+    iterations = np.zeros(n, dtype=int)
+    active = np.ones(n, dtype=bool)
+    converged = np.zeros(n, dtype=bool)
+    stalled = np.zeros(n, dtype=bool)
+    eye = np.eye(n_params)
+
+    for _ in range(max_iter):
+        idx = np.nonzero(active)[0]
+        if idx.size == 0:
+            break
+        JtJ = np.einsum('bmp,bmq->bpq', J[idx], J[idx])
+        g = np.einsum('bmp,bm->bp', J[idx], r[idx])
+        diag = np.einsum('bpp->bp', JtJ)[..., np.newaxis]*eye
+        step = -np.linalg.solve(JtJ+damping[idx, np.newaxis, np.newaxis]*(diag+1e-12*eye), g[..., np.newaxis])[..., 0]
+
+        r_new, J_new = residuals(u[idx]+step, idx)
+        cost_new = np.sum(r_new**2, axis=1)
+        better = cost_new < cost[idx]
+        iterations[idx] += 1
+
+        accepted = idx[better]
+        decrease = cost[accepted]-cost_new[better]
+        u[accepted] += step[better]
+        r[accepted], J[accepted], cost[accepted] = r_new[better], J_new[better], cost_new[better]
+        damping[accepted] /= 3
+        damping[idx[~better]] *= 4
+
+        # converged: relative decrease below tol, or steps (accepted or not)
+        # that cannot move the point anymore
+        small_step = np.linalg.norm(step, axis=1) <= tol*(tol+np.linalg.norm(u[idx], axis=1))
+        small_decrease = np.zeros(idx.size, dtype=bool)
+        small_decrease[better] = decrease <= tol*np.maximum(cost[accepted], 1e-300)
+        done = idx[small_step | small_decrease]
+        converged[done] = True
+        # no decrease found even with heavily damped steps, which are still
+        # above tol: stalled, the point may or may not be a local minimum
+        rejected = idx[~better & ~small_step]
+        stuck = rejected[damping[rejected] > 1e12]
+        stalled[stuck] = True
+        active[done] = active[stuck] = False
+
+    return _to_params(u, log_bounds)[0], cost, iterations, converged, stalled
+
+
+class FitResult(object):
+    """Per-sample output of BatchFitter.fit"""
+
+    def __init__(self, names, params, cost, iterations, converged, stalled, starts):
+        self.names = names
+        self.params = params  # (n_samples, n_params)
+        self.cost = cost
+        self.iterations = iterations
+        self.converged = converged  # cost decrease or step below tol
+        self.stalled = stalled  # no decrease found anymore (see fit_samples)
+        self.starts = starts  # index of the start the retained solution comes from
+
+    def as_dicts(self):
+        return [dict(zip(self.names, _)) for _ in self.params]
+
+
+class BatchFitter(object):
+    """Fits medium parameters to many measured curves at once
+
+    The solver is compiled once with omega and the fitted parameters as
+    arguments (and the Jacobian w.r.t. the latter), then all samples and all
+    starting points are optimized together by a vectorized Levenberg-Marquardt.
+    Parameters are kept within their bounds (by default the PARAM_BOUNDS of the
+    medium they belong to) through a log-logistic change of variables.
+    """
+
+    def __init__(self, solver, params, theta=0., bounds=None, **lambdify_options):
+        self.solver = solver
+        self.params = list(params)
+        self.theta = theta
+
+        bounds = dict(bounds) if bounds is not None else {}
+        self.bounds = []
+        for p in self.params:
+            if p not in bounds and str(p) not in bounds:
+                owners = [L.medium for L in solver.layers if p in L.medium.syms.values()]
+                if owners == [] or str(p) not in owners[0].PARAM_BOUNDS:
+                    raise KeyError(f'No bounds known for parameter "{p}"')
+                bounds[p] = owners[0].PARAM_BOUNDS[str(p)]
+            self.bounds.append(bounds.get(p, bounds.get(str(p))))
+        self.log_bounds = np.log(np.array(self.bounds, dtype=float)).T
+
+        omega = solver.Gref['syms']['omega']
+        solver.lambdify([omega]+self.params, {'theta': theta}, jacobian=self.params, **lambdify_options)
+        self.source = solver.Zs_jac_source
+
+    def _starts(self, n_samples, initial, n_starts, seed):
+        rand = np.random.RandomState(seed)
+        u0 = rand.uniform(-2, 2, size=(n_samples, n_starts, len(self.params)))
+        if initial is not None:
+            initial = np.broadcast_to(np.asarray(initial, dtype=float), (n_samples, len(self.params)))
+            u0[:, 0, :] = _from_params(initial, self.log_bounds)
+        return u0
+
+    def fit(self, omega, measured, target='Zs', initial=None, n_starts=4, seed=0,
+            max_iter=100, tol=1e-10, executor=None, n_jobs=None):
+        """Fits every measured curve
+
+        omega -- (n_omega,) circular frequencies of the measurements
+        measured -- (n_samples, n_omega) measured Zs or absorption curves
+        target -- 'Zs' or 'absorption'
+        initial -- optional initial guess (n_params,) or (n_samples, n_params),
+                   used as the first start, the others are drawn at random
+        executor -- optional concurrent.futures executor, samples are then split
+                    in n_jobs groups fitted in parallel (default: one group
+                    per worker of the executor)
+        """
+
+        measured = np.atleast_2d(measured)
+        n_samples = measured.shape[0]
+        u0 = self._starts(n_samples, initial, n_starts, seed)
+
+        # every (sample, start) couple is an independent problem
+        problems = np.repeat(measured, n_starts, axis=0)
+        u0 = u0.reshape(n_samples*n_starts, len(self.params))
+        job = (self.source, omega)
+        options = (target, self.solver.sat_med.V['Z'], self.theta, self.log_bounds)
+
+        if executor is None:
+            status = fit_samples(*job, problems, *options, u0, max_iter, tol)
+        else:
+            if n_jobs is None:
+                n_jobs = getattr(executor, '_max_workers', None) or os.cpu_count() or 1
+            groups = np.array_split(np.arange(n_samples*n_starts), n_jobs)
+            futures = [
+                executor.submit(fit_samples, *job, problems[g], *options, u0[g], max_iter, tol)
+                for g in groups if g.size
+            ]
+            status = [np.concatenate(_) for _ in zip(*[f.result() for f in futures])]
+        params, cost, iterations, converged, stalled = status
+
+        cost = cost.reshape(n_samples, n_starts)
+        best = np.argmin(cost, axis=1)
+        pick = lambda a: a.reshape((n_samples, n_starts)+a.shape[1:])[np.arange(n_samples), best]
+        return FitResult(
+            [str(_) for _ in self.params],
+            pick(params), pick(cost.ravel()), pick(iterations), pick(converged), pick(stalled), best
+        )
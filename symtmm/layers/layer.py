@@ -25,10 +25,13 @@ import sympy as sp
 class Layer(object):
 
     def __init__(self, medium, thickness, name="Unnamed Layer"):
-        self.thickness = sp.symbols('d')
+        # each layer gets its own thickness symbol so that thicknesses can be
+        # kept as parameters of the compiled functions, where they are named
+        # after the position of the layer (d_0, d_1, ... see Solver.lambdify)
+        self.thickness = sp.Dummy('d')
         self.V_thickness = thickness
         self.medium = medium
         self.name = name
 
     def __str__(self):
-        return f'{self.name} - {self.thickness}m of {self.medium.name} (self.medium.MEDIUM_TYPE)'
+        return f'{self.name} - {self.V_thickness}m of {self.medium.name} ({self.medium.MEDIUM_TYPE})'
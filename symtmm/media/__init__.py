@@ -1,3 +1,4 @@
 from .medium import Medium
 from .eqf import Eqf
 from .air import Air
+from .utils import generic_medium, medium_from_dict
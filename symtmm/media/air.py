@@ -21,13 +21,14 @@
 
 import numpy as np
 
-from .medium import Medium
+from .medium import Medium, MediumState
 
 
 class Air(Medium):
 
     MEDIUM_TYPE = 'fluid'
     MODEL = MEDIUM_TYPE
+    DERIVED_PARAMS = ['K', 'c', 'Z', 'C_v', 'nu', 'nu_prime']
 
     EXPECTED_PARAMS = [
         ('T', float),
@@ -59,10 +60,24 @@ class Air(Medium):
         self.V['molar_mass'] = 0.29e-1  # molar mass [kg.mol^-1]
         self.V['rho'] = 1.213  # density [kg.m^-3]
         self.V['C_p'] = 1006  # (mass) specific heat capacity as constant pressure [J.K^-1]
+        self._compute_missing()
 
-        self.V['K'] = self.V['gamma']*self.V['P']  # adiabatic bulk modulus
-        self.V['c'] = np.sqrt(self.V['K']/self.V['rho'])  # adiabatic sound speed
-        self.V['Z'] = self.V['rho']*self.V['c']  # characteristic impedance
-        self.V['C_v'] = self.V['C_p']/self.V['gamma']  # (mass) specific heat capacity as constant volume [J.K^-1]
-        self.V['nu'] = self.V['mu']/self.V['rho']  # kinematic viscosity [m.s^-2]
-        self.V['nu_prime'] = self.V['nu']/self.V['Pr']  # viscothermal losses
+        self.state = MediumState.COMPLETE
+
+    def _compute_missing(self):
+        """Computes the derived values that are not set (None)"""
+        derived = [
+            ('K', lambda V: V['gamma']*V['P']),  # adiabatic bulk modulus
+            ('c', lambda V: np.sqrt(V['K']/V['rho'])),  # adiabatic sound speed
+            ('Z', lambda V: V['rho']*V['c']),  # characteristic impedance
+            ('C_v', lambda V: V['C_p']/V['gamma']),  # (mass) specific heat capacity as constant volume [J.K^-1]
+            ('nu', lambda V: V['mu']/V['rho']),  # kinematic viscosity [m.s^-2]
+            ('nu_prime', lambda V: V['nu']/V['Pr']),  # viscothermal losses
+        ]
+        for name, value in derived:
+            if self.V[name] is None:
+                self.V[name] = value(self.V)
+
+    def _compute_frequency(self, omega):
+        ones = np.ones(np.shape(omega))
+        return {_: self.V[_]*ones for _ in ('rho', 'K', 'c', 'Z')}
@@ -18,6 +18,7 @@
 # copies or substantial portions of the Software.
 #
 
+import numpy as np
 import sympy as sp
 
 from .medium import Medium
@@ -38,6 +39,13 @@ class Eqf(Medium):
         ('E', float),  # Young's modulus
         ('eta', float)  # viscosity
     ]
+    PARAM_BOUNDS = {
+        'phi': (0.05, 1.),
+        'sigma': (1e2, 1e7),
+        'alpha': (1., 10.),
+        'Lambda_prime': (1e-6, 1e-2),
+        'Lambda': (1e-6, 1e-2),
+    }
 
     def __init__(self, global_refs):
         super().__init__(global_refs)
@@ -60,5 +68,33 @@ class Eqf(Medium):
 
         self.c_eq_til = sp.sqrt(self.K_eq_til/self.rho_eq_til)
 
+    def _frequency_dependencies(self):
+        return [self.V, self.Gref['sat'].V]
+
+    def _compute_frequency(self, omega):
+        """ Numerical counterpart of the models in __init__ """
+        V, A = self.V, self.Gref['sat'].V
+        omega = np.asarray(omega, dtype=complex)
+
+        #  Johnson et al model for rho_eq_til
+        omega_0 = V['sigma']*V['phi']/(A['rho']*V['alpha'])
+        omega_infty = (V['sigma']*V['phi']*V['Lambda'])**2/(4*A['mu']*A['rho']*V['alpha']**2)
+        F_JKD = np.sqrt(1+1j*omega/omega_infty)
+        rho_eq_til = (A['rho']*V['alpha']/V['phi'])*(1+(omega_0/(1j*omega))*F_JKD)
+
+        #  Champoux-Allard model for K_eq_til
+        omega_prime_infty = (16*A['nu_prime'])/(V['Lambda_prime']**2)
+        F_prime_CA = np.sqrt(1+1j*omega/omega_prime_infty)
+        alpha_prime_til = 1+omega_prime_infty*F_prime_CA/(2*1j*omega)
+        K_eq_til = (A['gamma']*A['P']/V['phi'])/(A['gamma']-(A['gamma']-1)/alpha_prime_til)
+
+        return {
+            'rho_eq_til': rho_eq_til,
+            'alpha_til': V['phi']*rho_eq_til/A['rho'],
+            'alpha_prime_til': alpha_prime_til,
+            'K_eq_til': K_eq_til,
+            'c_eq_til': np.sqrt(K_eq_til/rho_eq_til),
+        }
+
     def _compute_missing(self):
         self.V['N'] = self.V['E']/(2*(1+self.V['nu']))
@@ -19,23 +19,39 @@
 # copies or substantial portions of the Software.
 #
 
+import hashlib
+
+import numpy as np
 import sympy as sp
 from enum import Enum
 
+from symtmm.utils import LRUCache
+
 
 MediumState = Enum('medium_state', 'INCOMPLETE COMPLETE')
 
+# frequency dependent values, shared by all the media with the same parameters
+_frequency_memo = LRUCache(64)
+
+
+def _array_key(a):
+    a = np.ascontiguousarray(a)
+    return (a.shape, a.dtype.str, hashlib.sha1(a.tobytes()).hexdigest())
+
 
 class Medium(object):
     """ Holds a medium definition and allows its manipulation and loading """
 
     EXPECTED_PARAMS = []
     OPT_PARAMS = []
+    PARAM_BOUNDS = {}  # plausible (min, max) range of parameters, used when fitting
+    DERIVED_PARAMS = []  # parameters computed from the others by _compute_missing
     MEDIUM_TYPE = 'generic'
     MODEL = ''
 
     def __init__(self, global_refs):
         self.omega = -1
+        self.V_freq = {}
         self.name = 'Generic Medium'
 
         param_names = list(map(lambda _: _[0], self.__class__.EXPECTED_PARAMS+self.__class__.OPT_PARAMS))
@@ -58,8 +74,32 @@ class Medium(object):
             raise AttributeError(f'{n} is neither an attribute of {self.__class__} object nor an inner symbol.')
 
     def update_frequency(self, omega):
-        """ Computes parameters' value for the given circular frequency """
-        pass
+        """ Computes parameters' value for the given circular frequency
+
+        omega can be an array, all the values are then computed in a single
+        vectorized pass. Results are memoized per (medium values, frequencies)
+        and stored (read-only) in self.V_freq, which is also returned.
+        """
+        key = (self.__class__, _array_key(omega)) + tuple(
+            tuple(sorted(values.items())) for values in self._frequency_dependencies()
+        )
+        V_freq = _frequency_memo.get(key)
+        if V_freq is None:
+            V_freq = self._compute_frequency(np.asarray(omega))
+            for v in V_freq.values():
+                if isinstance(v, np.ndarray):
+                    v.flags.writeable = False
+            _frequency_memo.put(key, V_freq)
+        self.omega = omega
+        self.V_freq = V_freq
+        return V_freq
+
+    def _frequency_dependencies(self):
+        """ Values the frequency dependent quantities are computed from """
+        return [self.V]
+
+    def _compute_frequency(self, omega):
+        return {}
 
     def _compute_missing(self):
         pass
@@ -0,0 +1,56 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# utils.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+from .eqf import Eqf
+from .air import Air
+
+
+MEDIA_TYPES = {_.MEDIUM_TYPE: _ for _ in (Eqf, Air)}
+
+
+def generic_medium(medium_type):
+    """Returns the medium class corresponding to the given MEDIUM_TYPE"""
+
+    try:
+        return MEDIA_TYPES[medium_type]
+    except KeyError:
+        raise ValueError(f'Type of medium "{medium_type}" not known')
+
+
+def medium_from_dict(global_refs, definition):
+    """Builds a medium from a definition holding its 'medium_type' and parameters
+
+    Media that are complete on creation (such as Air) keep their default
+    values for the parameters that are not in the definition, and their
+    derived values are computed again (unless given in the definition).
+    """
+
+    medium = generic_medium(definition['medium_type'])(global_refs)
+    if medium.is_complete():
+        types = dict(medium.EXPECTED_PARAMS+medium.OPT_PARAMS)
+        given = {k: types[k](v) for k, v in definition.items() if k in types}
+        medium.V.update(given)
+        medium.V.update({k: None for k in medium.DERIVED_PARAMS if k not in given})
+        medium._compute_missing()
+        medium.name = definition.get('name', medium.name)
+    else:
+        medium.from_dict(definition)
+    return medium
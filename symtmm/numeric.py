@@ -0,0 +1,161 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# numeric.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+import numpy as np
+
+from symtmm.layers.utils import SV_LENGTH
+from symtmm.interfaces.utils import generic_interface
+from symtmm.media import Air
+from symtmm.acoustics import diffuse_absorption
+
+
+def fluid_properties(medium, omega):
+    """Returns the (rho, c) couple of a fluid-model medium at omega"""
+
+    V_freq = medium.update_frequency(omega)
+    if medium.MEDIUM_TYPE == 'eqf':
+        return V_freq['rho_eq_til'], V_freq['c_eq_til']
+    elif medium.MEDIUM_TYPE == 'fluid':
+        return V_freq['rho'], V_freq['c']
+    else:
+        raise ValueError('Provided material is not a fluid')
+
+
+def fluid_layer(omega, k_x, medium, d):
+    """Batched counterpart of symtmm.layers.fluid.fluid_layer, shape (..., 2, 2)"""
+
+    rho, c = fluid_properties(medium, omega)
+    k_z = np.sqrt((omega/c)**2 - k_x**2 + 0j)
+    cos, sin = np.cos(k_z*d), np.sin(k_z*d)
+
+    T = np.empty(np.broadcast(k_z, omega).shape + (2, 2), dtype=complex)
+    T[..., 0, 0] = cos
+    T[..., 0, 1] = 1j*omega*rho/k_z*sin
+    T[..., 1, 0] = 1j*k_z/(omega*rho)*sin
+    T[..., 1, 1] = cos
+    return T
+
+
+def generic_layer(medium):
+
+    if medium.MODEL == 'fluid':
+        return fluid_layer
+
+
+def stack_saturating_medium(media, saturating_medium=None):
+    """Saturating medium of a stack: the one its media were defined with (Gref['sat'])
+
+    Media such as Eqf take the air values of their models from Gref['sat'],
+    k_x and the characteristic impedance must then use the same medium.
+    Raises a ValueError if the media (or the given saturating_medium) do not
+    agree, defaults to Air if none is known.
+    """
+    candidates = [m.Gref['sat'] for m in media if 'sat' in m.Gref]
+    if saturating_medium is not None:
+        candidates.insert(0, saturating_medium)
+    if not candidates:
+        return Air({})
+    first = candidates[0]
+    for m in candidates[1:]:
+        if m is not first and (m.__class__ is not first.__class__ or m.V != first.V):
+            raise ValueError('The media of the stack are not defined with the same saturating medium')
+    return first
+
+
+def to_array(M):
+    """Converts a (constant) symbolic matrix to a complex array"""
+    return np.array(M.tolist(), dtype=complex)
+
+
+def null_space(M):
+    """Basis (as columns) of the null space of a constant matrix"""
+    _, s, Vh = np.linalg.svd(M)
+    rank = int(np.sum(s > 1e-12*max(M.shape)))
+    return Vh[rank:].conj().T
+
+
+class NumericSolver(object):
+    """Evaluates the surface impedance of a layered system with NumPy only
+
+    Uses the same Layer/Medium objects as the symbolic Solver but skips the
+    symbolic assembly: layer and interface matrices are built as batched
+    complex arrays and chained from the backing to the incident medium.
+    """
+
+    def __init__(self, layers=None, backing=None, saturating_medium=None):
+        self.layers = layers if layers is not None else []
+        self.backing = backing
+        self.saturating_medium = saturating_medium
+
+    @property
+    def sat_med(self):
+        """The saturating medium (by default, the one the media were defined with)"""
+        return stack_saturating_medium([L.medium for L in self.layers], self.saturating_medium)
+
+    @classmethod
+    def from_solver(cls, solver):
+        return cls(solver.layers, solver.backing, solver.sat_med)
+
+    def _backing_states(self):
+        last_medium = self.layers[-1].medium
+        B = to_array(self.backing(last_medium))
+        S = null_space(B)
+        if S.shape != (SV_LENGTH[last_medium.MODEL], SV_LENGTH[last_medium.MODEL]//2):
+            raise ValueError('The backing does not leave a valid set of admissible states')
+        return S
+
+    def _interface_transfer(self, medium_left, medium_right):
+        """ -I^-1 J, the matrix mapping the right state to the left one """
+        I, J = map(to_array, generic_interface(medium_left, medium_right)())
+        if I.shape[0] != I.shape[1]:
+            raise NotImplementedError('Only square interface matrices are supported')
+        return -np.linalg.solve(I, J)
+
+    def Zs(self, omega, theta=0.):
+        """Surface impedance for the given circular frequencies and angles
+
+        omega and theta are broadcast against each other, so that
+        Zs(omega[:, None], theta[None, :]) returns a frequency x angle grid.
+        """
+
+        if self.layers == [] or self.backing is None:
+            raise ValueError('Empty layer list or undefined backing')
+
+        omega = np.asarray(omega, dtype=float)
+        theta = np.asarray(theta, dtype=float)
+        sat_med = self.sat_med
+        k_x = omega/sat_med.V['c']*np.sin(theta)
+
+        state = self._backing_states()
+        for i_L in range(len(self.layers)-1, -1, -1):
+            L = self.layers[i_L]
+            T = generic_layer(L.medium)(omega, k_x, L.medium, L.V_thickness)
+            state = T @ state
+            medium_left = sat_med if i_L == 0 else self.layers[i_L-1].medium
+            state = self._interface_transfer(medium_left, L.medium) @ state
+
+        return state[..., 0, 0]/state[..., 1, 0]
+
+    def diffuse_absorption(self, omega, nodes=8, theta_max=np.pi/2):
+        """Diffuse field absorption (Paris formula, Gauss-Legendre quadrature)"""
+        omega = np.asarray(omega, dtype=float)[..., np.newaxis]
+        Zs_theta = lambda thetas: self.Zs(omega, thetas)
+        return diffuse_absorption(Zs_theta, self.sat_med.V['Z'], nodes, theta_max)
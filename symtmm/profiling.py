@@ -0,0 +1,97 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# profiling.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+import time
+import logging
+from contextlib import contextmanager
+
+
+logger = logging.getLogger('symtmm')
+
+
+def expression_size(expr):
+    """Number of distinct nodes of an expression
+
+    Shared subexpressions are only counted once, so that this stays linear in
+    the size of the expression DAG (unlike count_ops, which walks the tree).
+    """
+    seen = set()
+    stack = [expr]
+    while stack:
+        e = stack.pop()
+        if e in seen:
+            continue
+        seen.add(e)
+        stack.extend(getattr(e, 'args', ()))
+    return len(seen)
+
+
+class Profiler(object):
+    """Collects per-stage statistics (one dict per stage run)
+
+    Each record holds at least the stage name and its wall time, stages add
+    their own metrics (matrix sizes, expression sizes, ...). A stage that
+    raises is recorded too, with an 'error' field, before the exception
+    propagates. Records are appended to the records list (only the last
+    max_records are kept), logged on the 'symtmm' logger and passed to every
+    registered callback.
+    """
+
+    def __init__(self, records=None, callbacks=None, max_records=1024):
+        self.records = records if records is not None else []
+        self.callbacks = list(callbacks) if callbacks is not None else []
+        self.max_records = max_records
+
+    def add_callback(self, callback):
+        self.callbacks.append(callback)
+
+    @contextmanager
+    def stage(self, name, **info):
+        record = {'stage': name}
+        record.update(info)
+        t0 = time.perf_counter()
+        try:
+            yield record
+        except BaseException as e:
+            record['error'] = f'{e.__class__.__name__}: {e}'
+            raise
+        finally:
+            record['time'] = time.perf_counter()-t0
+            self._add(record)
+
+    def _add(self, record):
+        self.records.append(record)
+        if len(self.records) > self.max_records:
+            del self.records[:len(self.records)-self.max_records]
+        metrics = {k: v for k, v in record.items() if k not in ('stage', 'time', 'error')}
+        if 'error' in record:
+            logger.warning('%s failed after %.3fs (%s) %s', record['stage'], record['time'], record['error'], metrics)
+        else:
+            logger.info('%s: %.3fs %s', record['stage'], record['time'], metrics)
+        for callback in self.callbacks:
+            callback(record)
+
+    def summary(self):
+        """Total time spent per stage"""
+        totals = {}
+        for record in self.records:
+            totals[record['stage']] = totals.get(record['stage'], 0.)+record['time']
+        return totals
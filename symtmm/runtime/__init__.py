@@ -0,0 +1,3 @@
+from .kernel import Kernel, load_kernel, compile_source, cached_kernel
+from .native import native_kernel
+from .precision import PRECISIONS, single_precision, numeric_kernel, mpmath_kernel, sampled_error
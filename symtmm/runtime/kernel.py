@@ -0,0 +1,93 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# kernel.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+# NOTE: this module is part of the runtime and must only depend on NumPy (and
+# the standard library), never on SymPy.
+
+import json
+
+
+# generated kernels already compiled in the current process, by source
+_compiled_kernels = {}
+
+
+def compile_source(source, name):
+    """Executes a generated source and returns the function it defines"""
+    namespace = {}
+    exec(compile(source, f'<symtmm:{name}>', 'exec'), namespace)
+    return namespace[name]
+
+
+def cached_kernel(source, name):
+    """Same as compile_source, memoized per process (used by pool workers)"""
+    if (source, name) not in _compiled_kernels:
+        _compiled_kernels[(source, name)] = compile_source(source, name)
+    return _compiled_kernels[(source, name)]
+
+
+class Kernel(object):
+    """A generated Zs kernel, runnable without SymPy
+
+    source -- generated source (see symtmm.codegen)
+    params -- names of the kernel arguments, in order
+    name -- name of the function defined by the source
+    metadata -- free-form JSON-serialisable information (codegen stats, ...)
+    """
+
+    def __init__(self, source, params, name='Zs', metadata=None):
+        self.source = source
+        self.params = list(params)
+        self.name = name
+        self.metadata = metadata if metadata is not None else {}
+        self.func = cached_kernel(source, name)
+
+    def __call__(self, *args, **kwargs):
+        """Evaluates the kernel, arguments can be given by position or by name"""
+        if kwargs:
+            values = dict(zip(self.params, args))
+            values.update(kwargs)
+            missing = [_ for _ in self.params if _ not in values]
+            if missing:
+                raise TypeError(f'Missing kernel arguments: {", ".join(missing)}')
+            args = [values[_] for _ in self.params]
+        return self.func(*args)
+
+    def to_dict(self):
+        return {
+            'source': self.source,
+            'params': self.params,
+            'name': self.name,
+            'metadata': self.metadata,
+        }
+
+    def save(self, path):
+        with open(path, 'w') as fh:
+            json.dump(self.to_dict(), fh)
+
+    @classmethod
+    def from_dict(cls, definition):
+        return cls(definition['source'], definition['params'], definition['name'], definition.get('metadata'))
+
+
+def load_kernel(path):
+    """Loads a kernel saved by Kernel.save (or Solver.export_kernel)"""
+    with open(path, 'r') as fh:
+        return Kernel.from_dict(json.load(fh))
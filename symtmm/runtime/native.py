@@ -0,0 +1,65 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# native.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+import warnings
+
+from .kernel import compile_source
+
+
+# native kernels already built in the current process
+_native_kernels = {}
+
+
+def native_kernel(source, name, nb_args, single=False):
+    """Compiles a generated NumPy kernel into a fused elementwise ufunc
+
+    The generated code only uses scalar-compatible NumPy functions, so it is
+    compiled as-is by Numba into a ufunc evaluating the whole expression point
+    by point (real arguments, complex result) instead of one array temporary
+    per operation.
+
+    single -- compiles for float32 arguments and complex64 results
+
+    Returns None (with a warning) if Numba is not available or fails to
+    compile the kernel, callers then fall back to the NumPy kernel.
+    """
+
+    if (source, name, single) in _native_kernels:
+        return _native_kernels[(source, name, single)]
+
+    try:
+        import numba
+    except ImportError:
+        warnings.warn('numba is not available, falling back to the NumPy kernel')
+        return None
+
+    func = compile_source(source, name)
+    if single:
+        signature = numba.complex64(*([numba.float32]*nb_args))
+    else:
+        signature = numba.complex128(*([numba.float64]*nb_args))
+    try:
+        kernel = numba.vectorize([signature], nopython=True)(func)
+    except Exception as e:
+        warnings.warn(f'Native compilation failed ({e}), falling back to the NumPy kernel')
+        return None
+    _native_kernels[(source, name, single)] = kernel
+    return kernel
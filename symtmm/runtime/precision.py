@@ -0,0 +1,110 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# precision.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+import numpy as np
+
+from .kernel import compile_source, cached_kernel
+from .native import native_kernel
+
+
+PRECISIONS = ('complex64', 'complex128', 'mpmath')
+
+
+def single_precision(func):
+    """Evaluates a generated NumPy kernel in complex64
+
+    Arguments are cast to float32, Python constants of the generated code then
+    follow the type of the arrays they are combined with.
+    """
+    def wrapper(*args):
+        return np.asarray(func(*[np.asarray(_, dtype=np.float32) for _ in args]), dtype=np.complex64)
+    return wrapper
+
+
+def numeric_kernel(source, name, nb_args, backend='numpy', precision='complex128'):
+    """Compiles a generated NumPy kernel for a backend and a (NumPy) precision
+
+    backend -- 'numpy' or 'numba' (falls back to NumPy, see native_kernel)
+    precision -- 'complex128' or 'complex64'
+
+    Returns the function and the backend actually used.
+    """
+    if precision not in ('complex64', 'complex128'):
+        raise ValueError(f'Unsupported precision "{precision}" for a NumPy kernel')
+    single = precision == 'complex64'
+    if backend == 'numba':
+        kernel = native_kernel(source, name, nb_args, single=single)
+        if kernel is not None:
+            return (single_precision(kernel) if single else kernel), 'numba'
+    func = cached_kernel(source, name)
+    return (single_precision(func) if single else func), 'numpy'
+
+
+def mpmath_kernel(source, name, dps=30):
+    """Elementwise arbitrary precision evaluation of a kernel generated for mpmath
+
+    source -- generated with the 'mpmath' printer (see generate_source)
+    dps -- number of decimal digits of the working precision
+
+    The arguments are broadcast against each other and the results are
+    rounded to complex128. This is slow, and meant as a reference.
+    """
+    import mpmath
+
+    func = compile_source(source, name)
+
+    def point(*args):
+        with mpmath.workdps(dps):
+            return complex(func(*[mpmath.mpf(float(_)) for _ in args]))
+
+    def wrapper(*args):
+        ufunc = np.frompyfunc(point, len(args), 1)
+        return np.asarray(ufunc(*args), dtype=complex)
+    return wrapper
+
+
+def sampled_error(func, reference, args, samples=64, seed=0):
+    """Relative error of func with respect to reference, on sampled points
+
+    args -- kernel arguments (broadcast against each other), samples points
+            are drawn at random from the grid they span
+
+    Returns a dict with the 'max' and 'median' relative errors (over the points
+    where both values are finite) and the number of 'nonfinite' values of func
+    (e.g. overflows).
+    """
+    grid = np.broadcast_arrays(*[np.asarray(_, dtype=float) for _ in args])
+    flat = [_.reshape(-1) for _ in grid]
+    size = flat[0].size if flat else 1
+    idx = np.random.RandomState(seed).choice(size, min(samples, size), replace=False)
+    points = [_[idx] for _ in flat]
+
+    values = np.asarray(func(*points), dtype=complex)
+    ref = np.asarray(reference(*points), dtype=complex)
+    values, ref = np.broadcast_arrays(values, ref)
+    finite = np.isfinite(ref) & np.isfinite(values)
+    error = np.abs(values[finite]-ref[finite])/np.maximum(np.abs(ref[finite]), np.finfo(float).tiny)
+    return {
+        'max': float(np.max(error)) if error.size else np.nan,
+        'median': float(np.median(error)) if error.size else np.nan,
+        'nonfinite': int(np.sum(~np.isfinite(values))),
+        'samples': int(idx.size),
+    }
@@ -0,0 +1,211 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# service.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+import time
+import asyncio
+from collections import deque
+
+import numpy as np
+
+from symtmm.runtime import Kernel
+from symtmm.acoustics import absorption
+
+
+QUANTITIES = ('Zs', 'absorption')
+
+
+class _Request(object):
+
+    def __init__(self, args, shape, quantity, future):
+        self.args = args  # flattened arguments, in the kernel order
+        self.shape = shape
+        self.quantity = quantity
+        self.future = future
+        self.size = int(np.prod(shape))
+        self.t0 = time.perf_counter()
+
+
+class _Entry(object):
+    """A registered kernel and its pending requests"""
+
+    def __init__(self, kernel, Z, theta):
+        self.kernel = kernel
+        self.Z = Z
+        self.theta = theta
+        self.pending = deque()
+        self.pending_size = 0
+        self.wakeup = None  # created in the event loop (Python < 3.10 binds it on creation)
+        self.task = None
+
+
+class EvaluationService(object):
+    """Evaluates registered Zs kernels for many concurrent clients
+
+    Requests to the same kernel arriving within batch_window seconds (up to
+    max_batch points) are concatenated and evaluated in a single call, then
+    the results are scattered back to each caller.
+
+    batch_window -- time waited after the first request of a batch [s]
+    max_batch -- maximum number of points of a batch
+    executor -- optional (thread) executor the evaluations run in, so that
+                the event loop stays responsive during large batches
+    history -- number of batches/requests the metrics are computed over
+    """
+
+    def __init__(self, batch_window=1e-3, max_batch=2**16, executor=None, history=1024):
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.executor = executor
+        self.registry = {}
+        self._counters = {'requests': 0, 'batches': 0, 'points': 0, 'errors': 0}
+        self._batch_sizes = deque(maxlen=history)
+        self._latencies = deque(maxlen=history)
+
+    def register(self, name, kernel, Z=None, theta=0.):
+        """Adds a kernel to the registry
+
+        kernel -- symtmm.runtime.Kernel, or a lambdified Solver (its kernel is
+                  then exported, Z and theta taken from it)
+        Z -- characteristic impedance of the incident medium (for absorption)
+        theta -- angle of incidence used for absorption if theta is not a
+                 kernel parameter [rad]
+        """
+        if not isinstance(kernel, Kernel):
+            solver = kernel
+            kernel = solver.export_kernel()
+            Z = Z if Z is not None else solver.sat_med.V['Z']
+            theta = solver.V_Gref.get(solver.Gref['syms']['theta'], theta)
+        if name in self.registry:
+            self.unregister(name)
+        self.registry[name] = _Entry(kernel, Z, theta)
+
+    def unregister(self, name):
+        entry = self.registry.pop(name)
+        if entry.task is not None:
+            entry.task.cancel()
+        for request in entry.pending:
+            request.future.cancel()
+
+    async def evaluate(self, name, quantity='Zs', **values):
+        """Zs (or absorption) of a registered kernel
+
+        values -- value of every kernel parameter (by name), broadcast against
+                  each other
+
+        Returns an array of the broadcast shape.
+        """
+        entry = self.registry[name]
+        if quantity not in QUANTITIES:
+            raise ValueError(f'Unknown quantity "{quantity}"')
+        if quantity == 'absorption' and entry.Z is None:
+            raise ValueError(f'No characteristic impedance known for "{name}"')
+        missing = [_ for _ in entry.kernel.params if _ not in values]
+        if missing:
+            raise KeyError(f'Missing kernel arguments: {", ".join(missing)}')
+
+        args = np.broadcast_arrays(*[np.asarray(values[_], dtype=float) for _ in entry.kernel.params])
+        shape = args[0].shape if args else ()
+        # get_running_loop needs Python 3.7, get_event_loop returns the running loop in a coroutine
+        loop = asyncio.get_event_loop()
+        request = _Request([_.reshape(-1) for _ in args], shape, quantity, loop.create_future())
+
+        if entry.wakeup is None:
+            entry.wakeup = asyncio.Event()
+        entry.pending.append(request)
+        entry.pending_size += request.size
+        entry.wakeup.set()
+        if entry.task is None or entry.task.done():
+            entry.task = loop.create_task(self._dispatch(entry))
+        self._counters['requests'] += 1
+        return await request.future
+
+    async def _dispatch(self, entry):
+        loop = asyncio.get_event_loop()
+        while True:
+            await entry.wakeup.wait()
+            if entry.pending_size < self.max_batch:
+                await asyncio.sleep(self.batch_window)
+
+            batch, size = [], 0
+            while entry.pending and (not batch or size+entry.pending[0].size <= self.max_batch):
+                request = entry.pending.popleft()
+                entry.pending_size -= request.size
+                if not request.future.cancelled():
+                    batch.append(request)
+                    size += request.size
+            if not entry.pending:
+                entry.wakeup.clear()
+            if not batch:
+                continue
+
+            args = [np.concatenate(_) for _ in zip(*[r.args for r in batch])]
+            try:
+                if self.executor is not None:
+                    Zs = await loop.run_in_executor(self.executor, entry.kernel, *args)
+                else:
+                    Zs = entry.kernel(*args)
+                Zs = np.broadcast_to(Zs, (size,))
+            except Exception as e:
+                self._counters['errors'] += 1
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                continue
+
+            self._counters['batches'] += 1
+            self._counters['points'] += size
+            self._batch_sizes.append(len(batch))
+            start = 0
+            for request in batch:
+                values = Zs[start:start+request.size]
+                start += request.size
+                if request.quantity == 'absorption':
+                    values = absorption(values, entry.Z, self._theta(entry, request))
+                if not request.future.done():
+                    request.future.set_result(np.array(values).reshape(request.shape))
+                self._latencies.append(time.perf_counter()-request.t0)
+
+    @staticmethod
+    def _theta(entry, request):
+        if 'theta' in entry.kernel.params:
+            return request.args[entry.kernel.params.index('theta')]
+        return entry.theta
+
+    def metrics(self):
+        """Queue depths, request/batch counters, batch sizes and latencies [s]"""
+        latencies = np.array(self._latencies)
+        batch_sizes = np.array(self._batch_sizes)
+        metrics = dict(self._counters)
+        metrics['queue_depth'] = {k: len(v.pending) for k, v in self.registry.items()}
+        metrics['batch_size'] = {
+            'mean': float(np.mean(batch_sizes)) if batch_sizes.size else 0.,
+            'max': int(np.max(batch_sizes)) if batch_sizes.size else 0,
+        }
+        metrics['latency'] = {
+            k: float(np.percentile(latencies, q)) if latencies.size else 0.
+            for k, q in (('p50', 50), ('p95', 95), ('max', 100))
+        }
+        return metrics
+
+    async def close(self):
+        """Stops the dispatchers (pending requests are cancelled)"""
+        for name in list(self.registry):
+            self.unregister(name)
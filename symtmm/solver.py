@@ -20,12 +20,26 @@
 #
 
 
+import re
+
+import numpy as np
 import sympy as sp
 from enum import IntEnum
 
 from symtmm.layers.utils import SV_LENGTH, generic_layer
 from symtmm.interfaces.utils import generic_interface
 from symtmm.media import Air
+from symtmm.system import BlockSystem
+from symtmm.utils import LRUCache
+from symtmm.profiling import Profiler, expression_size
+from symtmm.codegen import generate_source, generate_jacobian_source, generate_outputs_source
+from symtmm.runtime import compile_source, Kernel
+from symtmm.runtime import PRECISIONS, numeric_kernel, mpmath_kernel, sampled_error
+from symtmm.cache import stack_description
+from symtmm.sweep import resolve_axes, chunk_size, chunk_bounds, evaluate_chunk, SweepStore, kernel_id, bounded_map
+from symtmm.acoustics import diffuse_absorption
+from symtmm.surrogate import adaptive_rational
+from symtmm.uncertainty import propagate
 
 
 class IncompleteDefinitionError(Exception):
@@ -39,7 +53,11 @@ SolverState = IntEnum('solver_state', 'INCOMPLETE STRUCTURE BOOTSTRAPED COMPLETE
 
 class Solver(object):
 
-    def __init__(self, media=None, layers=None, backing=None, saturating_medium=None):
+    def __init__(self, media=None, layers=None, backing=None, saturating_medium=None, hooks=None):
+        """
+        hooks -- optional list of callables, called with the statistics record
+                 (dict) of every pipeline stage run (see symtmm.profiling)
+        """
 
         _omega, _k_x, _theta = sp.symbols('omega k_x theta')
         self.Gref = {
@@ -57,7 +75,13 @@ class Solver(object):
 
         self.Gref['sat'] = self.sat_med
 
+        self.system = None
+        # blocks and partial eliminations reused across bootstraps
+        self._blocks_memo = LRUCache()
+        self._sweep_memo = LRUCache()
+        # per-stage statistics (time, sizes, ...) of the pipeline runs
         self.resultset = []
+        self.profiler = Profiler(self.resultset, hooks)
         self.state = SolverState.INCOMPLETE
 
     def check_structure(self):
@@ -71,55 +95,201 @@ class Solver(object):
         if [_ for _ in self.layers if _.medium.is_complete()] == self.layers:
             self.state = SolverState.COMPLETE
 
-    def bootstrap(self):
-        """Prepares the linear system in the Symbolic domain"""
+    def bootstrap(self, params=None, Gref_values=None):
+        """Prepares the linear system in the Symbolic domain
+
+        params -- optional list of the symbols to keep: every other value
+                  (medium parameters, thicknesses, saturating medium and
+                  Gref_values) is then folded into the blocks of each layer
+                  before the elimination (see lambdify)
+        """
         self.check_structure()
         if not self.state >= SolverState.STRUCTURE:
             raise IncompleteDefinitionError("Empty layer list")
 
-        # first layer is fluid (cf Allard & Atalla, 2009, Section 11.5)
-        nb_cols = sum(map(lambda _: SV_LENGTH[_.medium.MODEL], self.layers)) + SV_LENGTH[self.sat_med.MODEL]
         last_layer_model = self.layers[-1].medium.MODEL
-        if last_layer_model == 'fluid':
-            nb_rows = nb_cols-2
-        elif last_layer_model == 'elastic':
-            nb_rows = nb_cols-3
-        elif last_layer_model == 'pem':
-            nb_rows = nb_cols-4
-        else:
+        if last_layer_model not in SV_LENGTH:
             raise ValueError('Unknown model for the last layer')
 
-        self.A = sp.zeros(nb_rows, nb_cols)
+        folds = self._folds(params, Gref_values) if params is not None else [None]*len(self.layers)
+        keys = self._row_keys(folds)
+        with self.profiler.stage('bootstrap') as record:
+            # first layer is fluid (cf Allard & Atalla, 2009, Section 11.5)
+            self.system = BlockSystem(
+                [SV_LENGTH[self.sat_med.MODEL]] + [SV_LENGTH[_.medium.MODEL] for _ in self.layers]
+            )
+            record['built_rows'] = 0
+            record['folded'] = params is not None
+            for i_L, (L, fold, key) in enumerate(zip(self.layers, folds, keys)):
+                blocks = self._blocks_memo.get(key)
+                if blocks is None:
+                    # the first layer is made of the saturating media
+                    I, J = generic_interface(self.sat_med if i_L == 0 else self.layers[i_L-1].medium, L.medium)()
+                    M = generic_layer(L.medium)(self.Gref, L.medium, L.thickness)
+                    for subs in fold or []:
+                        M = M.subs(subs)
+                    blocks = (I, J*M)
+                    self._blocks_memo.put(key, blocks)
+                    record['built_rows'] += 1
+                self.system.add_row({i_L: blocks[0], i_L+1: blocks[1]}, key=key)
+            self.system.add_row(
+                {len(self.layers): self.backing(self.layers[-1].medium)},
+                key=self._backing_key()
+            )
+            record['matrix_shape'] = self.system.shape
+            record['nb_rows'] = len(self.system.rows)
+        self._bootstraped_keys = self._system_keys(folds)
+
+        self.state = SolverState.BOOTSTRAPED
+
+    def _check_params(self, params):
+        """Raises a ValueError if a parameter is a symbol of several media
+
+        Media of the same type share their symbols: a parameter would then
+        replace the values of all of them. Layers meant to share a parameter
+        must share the same medium object.
+        """
+        media = [self.sat_med]+[L.medium for L in self.layers]
+        for p in params:
+            owners = {id(m) for m in media if p in m.syms.values()}
+            if len(owners) > 1:
+                raise ValueError(f'Parameter "{p}" is a symbol of several media of the stack')
+
+    def _folds(self, params, Gref_values):
+        """Substitutions (applied in order) folding the values of each layer not listed in params
+
+        Same substitutions as _substitute, restricted to what a layer depends
+        on, so that two layers of the same type can hold different values.
+        """
+        params = list(params)
+        Gref_values = Gref_values if Gref_values is not None else {}
+        syms = self.Gref['syms']
+        k_x = {syms['k_x']: syms['omega']/self.sat_med.c*sp.sin(syms['theta'])}
+        sat_subs = self.sat_med.get_subs(exclude_list=params)
+        Gref_subs = {syms[k]: v for k, v in Gref_values.items() if k in syms}
+
+        folds = []
+        for L in self.layers:
+            thickness = {L.thickness: L.V_thickness} if L.thickness not in params else {}
+            folds.append((L.medium.get_subs(exclude_list=params), thickness, k_x, sat_subs, Gref_subs))
+        return folds
+
+    def _row_keys(self, folds=None):
+        """Identifies the blocks of each interface/layer row of the system
 
-        row_index, col_index = 0, SV_LENGTH[self.sat_med.MODEL]
+        A row only depends on the model on the left of the interface, on the
+        type and symbols of the layer medium, on the layer thickness symbol and
+        on the values folded in the layer (if any).
+        """
+        folds = folds if folds is not None else [None]*len(self.layers)
+        keys = []
+        for i_L, (L, fold) in enumerate(zip(self.layers, folds)):
+            left = self.sat_med if i_L == 0 else self.layers[i_L-1].medium
+            keys.append((
+                left.MODEL,
+                L.medium.__class__, L.medium.MODEL, tuple(sorted(L.medium.syms.items())),
+                L.thickness,
+                None if fold is None else tuple(tuple(sorted(_.items(), key=str)) for _ in fold),
+            ))
+        return keys
+
+    def _backing_key(self):
+        return ('backing', self.backing, self.layers[-1].medium.MODEL)
+
+    def _system_keys(self, folds=None):
+        """Identifies the whole system: the layer rows, the backing row and the saturating medium"""
+        return (
+            self._row_keys(folds), self._backing_key(),
+            (self.sat_med.__class__, self.sat_med.MODEL),
+        )
+
+    def _kernel_symbols(self):
+        """Positional symbols (d_0, d_1, ...) the layers' thicknesses are kernel arguments as
+
+        The generated code, its arguments and the sweeps then only depend on
+        the position of the layers in the stack.
+        """
+        return {L.thickness: sp.Symbol(f'd_{i_L}') for i_L, L in enumerate(self.layers)}
+
+    def _param_name(self, key):
+        """Name of a kernel argument given as a symbol, a name or a 'layers[<i>].thickness' alias"""
         for i_L, L in enumerate(self.layers):
-            # the first layer is made of the saturating media
-            I, J = generic_interface(self.sat_med if i_L == 0 else self.layers[i_L-1], L.medium)()
-            M = generic_layer(L.medium)(self.Gref, L.medium, L.thickness)
-            self.A[row_index:row_index+I.shape[0], col_index-2:col_index] = I
-            self.A[row_index:row_index+I.shape[0], col_index:col_index+M.shape[1]] = J*M
-
-            row_index += I.shape[0]
-            col_index += M.shape[1]
-        term_matrix = sp.zeros(int(SV_LENGTH[last_layer_model]/2),self.A.shape[1])
-        term_matrix[:,-SV_LENGTH[last_layer_model]:] = self.backing(self.layers[-1].medium)
-        self.A = self.A.col_join(term_matrix)
+            if (isinstance(key, str) and key == f'layers[{i_L}].thickness') or key is L.thickness:
+                return f'd_{i_L}'
+        return str(key)
 
-        self.state = SolverState.BOOTSTRAPED
+    @property
+    def A(self):
+        """Dense view of the global system (cf Allard & Atalla 2009, eq. 11.79)"""
+        return self.system.to_dense()
 
     def _extract_Zs(self):
-        """ Extraction of the surface impedance, cf Allard & Atalla 2009, eq. 11.88 """
-        D1 = self.A.copy()
-        D1.col_del(0)
-        D2 = self.A.copy()
-        D2.col_del(1)
-        self.Zs = -D1.det()/D2.det()
-
-    def lambdify(self, params, Gref_values):
+        """ Extraction of the surface impedance, cf Allard & Atalla 2009, eq. 11.88
+
+        Instead of the ratio of determinants of eq. 11.88, the admissible states
+        are propagated block by block from the backing, which keeps the
+        expression size linear in the number of layers.
+        """
+        with self.profiler.stage('extract_Zs') as record:
+            S = self.system.sweep(memo=self._sweep_memo)
+            self.Zs = S[0, 0]/S[1, 0]
+            record['nodes'] = expression_size(self.Zs)
+
+    def _substitute(self, params, Gref_values, expr=None):
+        """Substitutes in self.Zs (or expr) the values of every symbol not listed in params
+
+        Only the symbols left in the expression are substituted: after a folded
+        bootstrap (see bootstrap), there is usually nothing left to do.
+        """
+        Zs = self.Zs.copy() if expr is None else expr
+
+        def subs(expr, values):
+            free = expr.free_symbols
+            values = {k: v for k, v in values.items() if sp.sympify(k) in free}
+            return expr.subs(values) if values else expr
+
+        thickness_subs = {}
+        for L in self.layers:
+            Zs = subs(Zs, L.medium.get_subs(exclude_list=params))
+            if L.thickness not in params:
+                thickness_subs[L.thickness] = L.V_thickness
+        Zs = subs(Zs, thickness_subs)
+        Zs = subs(Zs, {
+            self.Gref['syms']['k_x']: self.Gref['syms']['omega']/self.sat_med.c*sp.sin(self.Gref['syms']['theta'])
+        })
+        Zs = subs(Zs, self.sat_med.get_subs(exclude_list=params))
+
+        self._set_Gref_values(Gref_values)
+        return subs(Zs, Gref_values)
+
+    def _set_Gref_values(self, Gref_values):
+        """Stores the values of the global variables the function is compiled for"""
+        self.V_Gref = {self.Gref['syms'][k]: v for k, v in Gref_values.items() if k != 'k_x'}
+
+    def lambdify(self, params, Gref_values, cse=True, cache=None, jacobian=None, backend='numpy',
+                 precision='complex128', dps=30):
         """Creates a functional from an assembled linear system
 
-        params -- list of symbols to be turned into function arguments
+        params -- list of symbols to be turned into function arguments (may
+                  include layers' thickness symbols, see Layer.thickness, the
+                  argument is then named d_<i> after the position of the
+                  layer), a medium parameter must belong to a single medium
+                  object
         Gref_values -- values to be substituted in the expression (dict)
+        cse -- run a common subexpression elimination before generating the
+               function (operation counts are stored in self.codegen_stats)
+        cache -- optional KernelCache, looked up before any symbolic work (the
+                 system is bootstrapped on a miss if it was not already)
+        jacobian -- optional subset of params, also compiles self.Zs_jac_func
+                    returning Zs and its derivatives w.r.t. these parameters
+                    (stacked along the last axis) with shared subexpressions
+        backend -- 'numpy' (default) or 'numba': the kernel is then compiled into
+                   a fused elementwise ufunc (real arguments), falling back to
+                   NumPy if Numba is unavailable or fails
+        precision -- 'complex128' (default), 'complex64' (arguments cast to
+                     float32, for screening) or 'mpmath' (arbitrary precision
+                     with dps digits, elementwise and slow, for verification),
+                     see also precision_error
         """
 
         # check that general variables are set/flaged as parameters
@@ -130,27 +300,357 @@ class Solver(object):
         ]))
         if False in checks:
             raise IncompleteDefinitionError("Some of the parameters aren't constraints")
+        jacobian = list(jacobian) if jacobian is not None else []
+        if [_ for _ in jacobian if _ not in params]:
+            raise ValueError("Derivatives can only be taken w.r.t. parameters")
+        if backend not in ('numpy', 'numba'):
+            raise ValueError(f'Unknown backend "{backend}"')
+        if precision not in PRECISIONS:
+            raise ValueError(f'Unknown precision "{precision}"')
+        self._check_params(params)
 
         self.check_complete()
         if not self.state >= SolverState.COMPLETE:
             raise IncompleteDefinitionError("Incomplete Material")
 
+        if cache is not None:
+            if self.layers == [] or self.backing is None:
+                raise IncompleteDefinitionError("Empty layer list")
+            cache_key = cache.key(stack_description(
+                self, params, Gref_values, cse=cse, jacobian=[params.index(_) for _ in jacobian]
+            ))
+            with self.profiler.stage('cache_lookup') as record:
+                hit = cache.get(cache_key)
+                record['hit'] = hit is not None
+            # the mpmath kernel is only generated on demand, it may be missing
+            if hit is not None and (precision != 'mpmath' or 'mpmath_source' in hit[1]):
+                self.Zs_source, metadata = hit
+                self.Zs_mp_source = metadata.get('mpmath_source')
+                self._Zs_expr = None
+                self.codegen_stats = metadata['stats']
+                self.Zs_func = self._compile_Zs(len(params), backend, precision, dps)
+                self.precision = precision
+                if jacobian:
+                    self.Zs_jac_source = metadata['jacobian_source']
+                    self.Zs_jac_func = compile_source(self.Zs_jac_source, 'Zs_jac')
+                self.params = [self._kernel_symbols().get(_, _) for _ in params]
+                self._set_Gref_values(Gref_values)
+                self.state = SolverState.LAMBDIFIED
+                return self.Zs_func
+
+        # (re-)bootstrap if the stack or the folded values changed since,
+        # unchanged blocks are reused
+        if self.system is None or self._bootstraped_keys != self._system_keys(self._folds(params, Gref_values)):
+            self.bootstrap(params, Gref_values)
         self._extract_Zs()
-        Zs = self.Zs.copy()
+        with self.profiler.stage('substitute') as record:
+            Zs = self._substitute(params, Gref_values)
+            record['nodes'] = expression_size(Zs)
+
+        kernel_symbols = self._kernel_symbols()
+        Zs = Zs.xreplace(kernel_symbols)
+        self.params = [kernel_symbols.get(_, _) for _ in params]
+        with self.profiler.stage('codegen') as record:
+            self.Zs_source, self.codegen_stats = generate_source('Zs', self.params, Zs, cse=cse)
+            record.update(self.codegen_stats)
+        self._Zs_expr, self._Zs_cse = Zs, cse
+        self.Zs_mp_source = None
+        with self.profiler.stage('compile') as record:
+            self.Zs_func = self._compile_Zs(len(params), backend, precision, dps)
+            self.precision = precision
+            record['backend'] = self.backend
+            record['precision'] = precision
+        metadata = {
+            'params': [str(_) for _ in self.params],
+            'stats': self.codegen_stats,
+        }
+        if self.Zs_mp_source is not None:
+            metadata['mpmath_source'] = self.Zs_mp_source
+        if jacobian:
+            with self.profiler.stage('jacobian') as record:
+                self.Zs_jac_source, metadata['jacobian_stats'] = generate_jacobian_source(
+                    'Zs_jac', self.params, Zs, [kernel_symbols.get(_, _) for _ in jacobian], cse=cse
+                )
+                self.Zs_jac_func = compile_source(self.Zs_jac_source, 'Zs_jac')
+                record.update(metadata['jacobian_stats'])
+            metadata['jacobian_source'] = self.Zs_jac_source
+        if cache is not None:
+            cache.put(cache_key, self.Zs_source, metadata)
+        self.state = SolverState.LAMBDIFIED
+        return self.Zs_func
 
-        thickness_subs = {}
-        for L in self.layers:
-            Zs = Zs.subs(L.medium.get_subs(exclude_list=params))
-            thickness_subs[L.thickness] = L.V_thickness
-        Zs = Zs.subs(thickness_subs)
-        Zs = Zs.subs({
-            self.Gref['syms']['k_x']: self.Gref['syms']['omega']/self.sat_med.c*sp.sin(180/sp.pi*self.Gref['syms']['theta'])
-        })
-        Zs = Zs.subs(self.sat_med.get_subs(exclude_list=params))
+    def lambdify_outputs(self, params, Gref_values, outputs=('Zs', 'R', 'alpha'), cse=True):
+        """Compiles a single function evaluating several outputs
 
-        self.V_Gref = {self.Gref['syms'][k]: v for k, v in Gref_values.items() if k != 'k_x'}
-        Zs = Zs.subs(Gref_values)
+        outputs -- names of the outputs, in order, among 'Zs', 'R' (reflection
+                   coefficient), 'alpha' (absorption) and the effective
+                   properties of the layers' media, as 'layers[<i>].<name>'
+                   (e.g. 'layers[0].c_eq_til' for an Eqf layer)
 
-        self.Zs_func = sp.lambdify(params, Zs, 'numpy')
-        self.state = SolverState.LAMBDIFIED
-        return self.Zs_func
+        The outputs share their subexpressions. The returned function takes
+        the params then an optional out sequence of arrays (one per output)
+        the results are written to, and returns a tuple of the outputs.
+        """
+
+        for _ in ('theta', 'omega'):
+            if self.Gref['syms'][_] not in params and _ not in Gref_values:
+                raise IncompleteDefinitionError("Some of the parameters aren't constraints")
+        self._check_params(params)
+        self.check_complete()
+        if not self.state >= SolverState.COMPLETE:
+            raise IncompleteDefinitionError("Incomplete Material")
+
+        folds = self._folds(params, Gref_values)
+        if self.system is None or self._bootstraped_keys != self._system_keys(folds):
+            self.bootstrap(params, Gref_values)
+        self._extract_Zs()
+
+        theta = self.Gref['syms']['theta']
+        with self.profiler.stage('substitute', outputs=len(outputs)) as record:
+            Zs = self._substitute(params, Gref_values)
+            Zs_cos = Zs*sp.cos(theta)
+            R = (Zs_cos-self.sat_med.Z)/(Zs_cos+self.sat_med.Z)
+            values = {'Zs': Zs, 'R': R, 'alpha': 1-sp.Abs(R, evaluate=False)**2}
+            exprs = []
+            for name in outputs:
+                prop = re.fullmatch(r'layers\[(\d+)\]\.(\w+)', name)
+                if prop is not None:
+                    i_L, attr = int(prop.group(1)), prop.group(2)
+                    expr = getattr(self.layers[i_L].medium, attr)
+                    if not isinstance(expr, sp.Basic):
+                        raise ValueError(f'"{name}" is not a symbolic property')
+                    # the values of the medium of this layer, before the others'
+                    for subs in folds[i_L]:
+                        expr = expr.subs(subs)
+                    expr = self._substitute(params, Gref_values, sp.sympify(expr))
+                elif name in values:
+                    expr = self._substitute(params, Gref_values, values[name])
+                else:
+                    raise ValueError(f'Unknown output "{name}"')
+                exprs.append(expr)
+            record['nodes'] = sum(expression_size(_) for _ in exprs)
+
+        with self.profiler.stage('codegen') as record:
+            kernel_symbols = self._kernel_symbols()
+            self.outputs_source, stats = generate_outputs_source(
+                'outputs', [kernel_symbols.get(_, _) for _ in params], [_.xreplace(kernel_symbols) for _ in exprs], cse=cse
+            )
+            record.update(stats)
+        self.outputs = list(outputs)
+        return compile_source(self.outputs_source, 'outputs')
+
+    def _compile_Zs(self, nb_args, backend, precision='complex128', dps=30):
+        """Compiles self.Zs_source with the requested backend and precision (sets self.backend)"""
+        if precision == 'mpmath':
+            self.backend = 'mpmath'
+            return mpmath_kernel(self._mpmath_source(), 'Zs', dps)
+        func, self.backend = numeric_kernel(self.Zs_source, 'Zs', nb_args, backend, precision)
+        return func
+
+    def _mpmath_source(self):
+        """Source of the mpmath counterpart of Zs_func, generated on first use"""
+        if getattr(self, 'Zs_mp_source', None) is None:
+            if getattr(self, '_Zs_expr', None) is None:
+                raise IncompleteDefinitionError("No symbolic expression of Zs, call lambdify without cache")
+            with self.profiler.stage('codegen', printer='mpmath'):
+                self.Zs_mp_source, _ = generate_source('Zs', self.params, self._Zs_expr, cse=self._Zs_cse, printer='mpmath')
+        return self.Zs_mp_source
+
+    def precision_error(self, values, precision='complex64', reference='mpmath', samples=64, dps=30, seed=0):
+        """Sampled relative error of Zs evaluated in a precision mode w.r.t. a reference mode
+
+        values -- {parameter (or its name): values} for every parameter of the
+                  compiled function, broadcast against each other; samples
+                  points are drawn at random from the resulting grid
+
+        Returns the statistics of symtmm.runtime.sampled_error.
+        """
+
+        if not self.state >= SolverState.LAMBDIFIED:
+            raise IncompleteDefinitionError("No compiled function, call lambdify first")
+
+        values = {self._param_name(k): v for k, v in values.items()}
+        names = [str(_) for _ in self.params]
+        missing = [_ for _ in names if _ not in values]
+        if missing:
+            raise KeyError(f'No value given for {", ".join(missing)}')
+
+        backend = self.backend
+        func, ref = [self._compile_Zs(len(names), 'numpy', _, dps) for _ in (precision, reference)]
+        self.backend = backend
+        return sampled_error(func, ref, [values[_] for _ in names], samples, seed)
+
+    def export_kernel(self, path=None):
+        """Returns the compiled Zs as a symtmm.runtime.Kernel (saved to path if given)
+
+        The kernel can then be loaded and evaluated without SymPy with
+        symtmm.runtime.load_kernel.
+        """
+
+        if not self.state >= SolverState.LAMBDIFIED:
+            raise IncompleteDefinitionError("No compiled function, call lambdify first")
+
+        kernel = Kernel(self.Zs_source, [str(_) for _ in self.params], 'Zs', {'stats': self.codegen_stats})
+        if path is not None:
+            kernel.save(path)
+        return kernel
+
+    def _check_vectorized(self):
+        """Raises if the compiled function cannot be evaluated over large grids (mpmath)"""
+        if not self.state >= SolverState.LAMBDIFIED:
+            raise IncompleteDefinitionError("No compiled function, call lambdify first")
+        if self.precision not in ('complex64', 'complex128'):
+            raise ValueError(f'Not available with the {self.precision} precision, use complex64 or complex128')
+
+    def iter_sweep(self, axes, max_memory=64*2**20, executor=None, step=None, skip=()):
+        """Evaluates the compiled Zs over a grid, chunk by chunk
+
+        Same arguments as sweep, plus:
+        step -- number of grid points per chunk (default: from max_memory)
+        skip -- (start, stop) chunks not to evaluate (e.g. already stored)
+
+        Yields (start, stop, values) tuples, in order, values being the
+        results over the [start, stop) range of the flattened grid. The chunks
+        are evaluated with the backend and precision Zs_func was compiled for.
+        """
+
+        self._check_vectorized()
+        axes = {self._param_name(k): v for k, v in axes.items()}
+        args, positions = resolve_axes(self.params, axes)
+        shape = tuple(np.asarray(_).size for _ in axes.values())
+        if step is None:
+            step = chunk_size(self.codegen_stats['temporaries'], len(args), max_memory, np.dtype(self.precision).itemsize)
+        skip = set(skip)
+        bounds = [_ for _ in chunk_bounds(int(np.prod(shape)), step) if _ not in skip]
+        job = (self.Zs_source, 'Zs', args, positions, shape)
+        mode = (self.backend, self.precision)
+
+        if executor is None:
+            for start, stop in bounds:
+                yield start, stop, evaluate_chunk(*job, start, stop, *mode)
+        else:
+            results = bounded_map(executor, evaluate_chunk, (job+b+mode for b in bounds))
+            for (start, stop), values in zip(bounds, results):
+                yield start, stop, values
+
+    def sweep(self, axes, max_memory=64*2**20, out=None, executor=None):
+        """Evaluates the compiled Zs over the grid spanned by the given axes
+
+        axes -- ordered mapping {parameter (or its name): 1D array} with one
+                axis per parameter of the compiled function, the output
+                dimensions follow the order of the axes
+        max_memory -- approximate memory budget of a chunk (bytes)
+        out -- optional preallocated (C-contiguous, complex) output array,
+               complex64 by default for the complex64 precision
+        executor -- optional concurrent.futures executor (thread or process
+                    pool) the chunks are dispatched to
+        """
+
+        self._check_vectorized()
+        shape = tuple(np.asarray(_).size for _ in axes.values())
+        if out is None:
+            out = np.empty(shape, dtype=self.precision)
+        elif out.shape != shape or not out.flags.c_contiguous:
+            raise ValueError(f'out must be a C-contiguous array of shape {shape}')
+        flat = out.reshape(-1)
+
+        for start, stop, values in self.iter_sweep(axes, max_memory, executor):
+            flat[start:stop] = values
+        return out
+
+    def sweep_to_file(self, axes, path, max_memory=64*2**20, executor=None):
+        """Same as sweep, but streams the results to a memory-mapped .npy file
+
+        The axes, the kernel identifier and the progress are saved next to it
+        (see symtmm.sweep.SweepStore): calling this again with the same axes
+        and kernel resumes an interrupted sweep, a different kernel starts it
+        over. Returns the memory-mapped results (see also
+        symtmm.sweep.load_sweep).
+        """
+
+        self._check_vectorized()
+        step = chunk_size(self.codegen_stats['temporaries'], len(self.params), max_memory, np.dtype(self.precision).itemsize)
+        axes = {self._param_name(k): v for k, v in axes.items()}
+        store = SweepStore(path, axes, step, kernel_id(self.Zs_source, self.params), dtype=self.precision)
+        for start, stop, values in self.iter_sweep(axes, executor=executor, step=store.step, skip=frozenset(store.completed)):
+            store.write(start, stop, values)
+        return store.data
+
+    def adaptive_sweep(self, omega_min, omega_max, values=None, tol=1e-6, **options):
+        """Rational surrogate of Zs(omega), sampled adaptively
+
+        omega must be a parameter of the compiled function, values holds the
+        (scalar) values of the other ones. Zs is only evaluated where the
+        rational approximation needs it, see symtmm.surrogate.adaptive_rational
+        for the options. Returns the surrogate (a callable of omega).
+        """
+
+        if not self.state >= SolverState.LAMBDIFIED:
+            raise IncompleteDefinitionError("No compiled function, call lambdify first")
+
+        values = {self._param_name(k): v for k, v in (values or {}).items()}
+        names = [str(_) for _ in self.params]
+        omega = str(self.Gref['syms']['omega'])
+        if omega not in names:
+            raise ValueError('omega must be a parameter of the compiled function')
+        missing = [_ for _ in names if _ != omega and _ not in values]
+        if missing:
+            raise KeyError(f'No value given for {", ".join(missing)}')
+
+        def Zs(omegas):
+            args = [omegas if _ == omega else np.full(omegas.shape, float(values[_])) for _ in names]
+            return np.broadcast_to(self.Zs_func(*args), omegas.shape)
+
+        return adaptive_rational(Zs, omega_min, omega_max, tol, **options)
+
+    def propagate_uncertainty(self, distributions, values, n_samples, **options):
+        """Statistics of the absorption (by default) under uncertain parameters
+
+        distributions -- {parameter (or its name): distribution}, see
+                         symtmm.uncertainty (thicknesses can be named
+                         'layers[<i>].thickness')
+        values -- {parameter (or its name): values} for the other parameters
+                  of the compiled function, broadcast against each other
+
+        See symtmm.uncertainty.propagate for the options (the backend and
+        precision default to the ones of Zs_func). Returns an
+        UncertaintyResult.
+        """
+
+        self._check_vectorized()
+        name = self._param_name
+        options.setdefault('backend', self.backend)
+        options.setdefault('precision', self.precision)
+        options.setdefault('Z', self.sat_med.V['Z'])
+        options.setdefault('theta', self.V_Gref.get(self.Gref['syms']['theta'], 0.))
+        return propagate(
+            self.Zs_source, [str(_) for _ in self.params],
+            {name(k): v for k, v in distributions.items()}, {name(k): v for k, v in values.items()},
+            n_samples, **options
+        )
+
+    def diffuse_absorption(self, values, nodes=8, theta_max=np.pi/2):
+        """Diffuse field absorption (Paris formula, Gauss-Legendre quadrature)
+
+        theta must be a parameter of the compiled function, all the angles are
+        evaluated in a single call.
+
+        values -- {parameter (or its name): value} for every other parameter,
+                  the values are broadcast against each other
+        nodes -- number of quadrature nodes over [0, theta_max]
+        """
+
+        if not self.state >= SolverState.LAMBDIFIED:
+            raise IncompleteDefinitionError("No compiled function, call lambdify first")
+
+        names = [str(_) for _ in self.params]
+        theta = str(self.Gref['syms']['theta'])
+        if theta not in names:
+            raise ValueError('theta must be a parameter of the compiled function')
+        values = {self._param_name(k): np.asarray(v)[..., np.newaxis] for k, v in values.items()}
+        missing = [_ for _ in names if _ != theta and _ not in values]
+        if missing:
+            raise KeyError(f'No value given for {", ".join(missing)}')
+
+        Zs_theta = lambda thetas: self.Zs_func(*[thetas if _ == theta else values[_] for _ in names])
+        return diffuse_absorption(Zs_theta, self.sat_med.V['Z'], nodes, theta_max)
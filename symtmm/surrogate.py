@@ -0,0 +1,156 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# surrogate.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+import warnings
+
+import numpy as np
+
+
+class RationalSurrogate(object):
+    """Rational function in barycentric form
+
+        r(z) = sum(w_j f_j/(z-z_j)) / sum(w_j/(z-z_j))
+
+    support -- support points z_j, values -- f_j, weights -- w_j
+    scale -- the variable is z = omega/scale
+    """
+
+    def __init__(self, support, values, weights, scale=1.):
+        self.support = support
+        self.values = values
+        self.weights = weights
+        self.scale = scale
+        self.error = None  # estimated relative error, see adaptive_rational
+        self.nodes = None  # points the approximated function was evaluated at
+
+    @property
+    def degree(self):
+        return self.support.size-1
+
+    def __call__(self, omega):
+        z = np.asarray(omega, dtype=float)/self.scale
+        shape = z.shape
+        z = z.reshape(-1, 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            C = 1/(z-self.support)
+            r = (C @ (self.weights*self.values))/(C @ self.weights)
+        # exact values at the support points
+        i_z, i_s = np.nonzero(z == self.support)
+        r[i_z] = self.values[i_s]
+        return r.reshape(shape)
+
+
+def aaa(z, f, tol=1e-13, max_terms=100):
+    """AAA rational approximation (Nakatsukasa, Sete & Trefethen, 2018)
+
+    Support points are added greedily where the error is largest, the weights
+    minimizing the linearized error over the other points, until the error is
+    below tol*max(|f|).
+
+    Returns the (support, values, weights) of the barycentric form.
+    """
+    z = np.asarray(z, dtype=float).ravel()
+    f = np.asarray(f, dtype=complex).ravel()
+    max_terms = min(max_terms, z.size//2)
+
+    free = np.ones(z.size, dtype=bool)
+    R = np.full(z.size, np.mean(f))
+    support = []
+    for _ in range(max(max_terms, 1)):
+        j = np.argmax(np.where(free, np.abs(f-R), -1))
+        support.append(j)
+        free[j] = False
+
+        zj, fj = z[support], f[support]
+        C = 1/(z[free, np.newaxis]-zj)
+        loewner = (f[free, np.newaxis]-fj)*C
+        weights = np.linalg.svd(loewner, full_matrices=False)[2][-1].conj()
+
+        R = f.copy()
+        R[free] = (C @ (weights*fj))/(C @ weights)
+        if np.max(np.abs(f-R)) <= tol*np.max(np.abs(f)):
+            break
+    return z[support], f[support], weights
+
+
+def adaptive_rational(func, omega_min, omega_max, tol=1e-6, n_init=16, batch=8,
+                      max_evals=1000, n_test=4000, log=True):
+    """Rational surrogate of a function of the frequency with adaptive sampling
+
+    The function is first evaluated at n_init points, then each iteration
+    fits an AAA approximant on all the points evaluated so far and compares
+    it with the previous one over a grid of n_test points (which are never
+    evaluated as such). The grid is split in batch groups, and the function is
+    only evaluated in the groups where the approximants still differ by more
+    than tol, at the point where they differ most. It stops once they agree
+    within tol everywhere on the grid and the previous approximant was within
+    tol of the function at the points evaluated last.
+
+    func -- vectorized function of omega (1D array) to approximate
+    tol -- relative tolerance, pointwise (|r-f| <= tol*|f|)
+    log -- if True, initial and test points are spaced logarithmically
+
+    Returns a RationalSurrogate, with error and nodes (evaluated points)
+    attributes. error estimates the relative error from the last validation
+    and the change between the last two approximants: it is a heuristic over
+    the test grid, not a bound, and the function is not checked elsewhere.
+    """
+
+    spacing = np.geomspace if log else np.linspace
+    test = spacing(omega_min, omega_max, n_test)
+    scale = float(omega_max)
+
+    omega = spacing(omega_min, omega_max, n_init)
+    values = np.asarray(func(omega), dtype=complex)
+    groups = np.array_split(np.arange(n_test), batch)
+    sampled = np.zeros(n_test, dtype=bool)  # test points evaluated already
+    previous, error = None, np.inf
+
+    while True:
+        surrogate = RationalSurrogate(*aaa(omega/scale, values, tol*1e-2), scale=scale)
+        approx = surrogate(test)
+        if previous is None:
+            picked = [g[g.size//2] for g in groups]
+        else:
+            change = np.abs(approx-previous(test))/np.abs(approx)
+            surrogate.error, surrogate.nodes = error+np.max(change), omega
+            # only sample where the approximants still disagree
+            change[sampled] = 0.
+            picked = [g[np.argmax(change[g])] for g in groups if np.max(change[g]) > tol]
+            if not picked:
+                if error <= tol:
+                    return surrogate
+                picked = [np.argmax(change)]
+        sampled[picked] = True
+        new = np.setdiff1d(test[picked], omega)
+        if new.size == 0 or omega.size >= max_evals:
+            warnings.warn(f'Tolerance not reached after {omega.size} evaluations (error ~ {error:.2g})')
+            surrogate.error, surrogate.nodes = error, omega
+            return surrogate
+
+        # validation of the current approximant at points it was not fitted on
+        new_values = np.asarray(func(new), dtype=complex)
+        error = np.max(np.abs(surrogate(new)-new_values)/np.abs(new_values))
+        omega = np.concatenate([omega, new])
+        values = np.concatenate([values, new_values])
+        order = np.argsort(omega)
+        omega, values = omega[order], values[order]
+        previous = surrogate
@@ -0,0 +1,204 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# sweep.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+import os
+import json
+import hashlib
+from collections import deque
+
+import numpy as np
+
+from symtmm.runtime import numeric_kernel
+
+
+def resolve_axes(params, axes):
+    """Matches named sweep axes with the kernel parameters
+
+    params -- list of the kernel parameters (symbols)
+    axes -- ordered mapping {parameter or parameter name: 1D array}
+
+    Returns the list of axes (as arrays) sorted in the kernel argument order
+    and, for each of them, its position in the output array.
+    """
+
+    names = [str(_) for _ in params]
+    positions = {}
+    for i_ax, key in enumerate(axes.keys()):
+        name = str(key)
+        if name not in names:
+            raise KeyError(f'"{name}" is not a parameter of the compiled function')
+        positions[names.index(name)] = i_ax
+    if len(positions) != len(params):
+        missing = [names[i] for i in range(len(params)) if i not in positions]
+        raise KeyError(f'No sweep axis given for {", ".join(missing)}')
+
+    arrays = [np.asarray(_).ravel() for _ in axes.values()]
+    return [arrays[positions[i]] for i in range(len(params))], [positions[i] for i in range(len(params))]
+
+
+def chunk_size(n_temporaries, n_args, max_memory, itemsize=16):
+    """Number of grid points per chunk for the given memory budget (in bytes)
+
+    Rough estimate: every argument and every temporary of the generated
+    kernel is materialized over the whole chunk.
+    """
+    return max(1, int(max_memory // (itemsize*(max(n_temporaries, 8) + n_args + 1))))
+
+
+def evaluate_chunk(source, name, args, positions, shape, start, stop, backend='numpy', precision='complex128'):
+    """Evaluates a generated kernel over the [start, stop) range of the flattened grid
+
+    backend and precision are those of symtmm.runtime.numeric_kernel.
+    """
+
+    func, _ = numeric_kernel(source, name, len(args), backend, precision)
+
+    index = np.unravel_index(np.arange(start, stop), shape)
+    values = func(*[arg[index[pos]] for arg, pos in zip(args, positions)])
+    return np.broadcast_to(values, (stop-start,))
+
+
+def chunk_bounds(size, step):
+    """(start, stop) ranges of the chunks of a flattened grid"""
+    return [(start, min(start+step, size)) for start in range(0, size, step)]
+
+
+def bounded_map(executor, func, calls):
+    """Results of func over calls (argument tuples), in order
+
+    The calls are submitted to the executor with a bounded number of them in
+    flight, to keep the memory use flat.
+    """
+
+    max_pending = 2*(os.cpu_count() or 1)
+    pending = deque()
+    for args in calls:
+        pending.append(executor.submit(func, *args))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def kernel_id(source, params):
+    """Identifies a generated kernel (source and argument names)"""
+    description = json.dumps({'source': source, 'params': [str(_) for _ in params]}, sort_keys=True)
+    return hashlib.sha256(description.encode('utf8')).hexdigest()
+
+
+class SweepStore(object):
+    """On-disk sweep result: a memory-mapped .npy array and its sidecars
+
+    The header (<path>.json) holds the axes (names and values, in the order of
+    the array dimensions), the chunk length, the dtype and the identifier of
+    the kernel (see kernel_id). The chunks already written are appended to a log
+    (<path>.chunks, one 'start stop' line per chunk), so that an interrupted
+    sweep can be resumed where it stopped. A stored sweep is only resumed if
+    its axes, kernel and dtype match, it is started over otherwise.
+    """
+
+    def __init__(self, path, axes, step, kernel, dtype=complex):
+        self.path = path
+        self.axes = {str(k): np.asarray(v).ravel() for k, v in axes.items()}
+        self.shape = tuple(_.size for _ in self.axes.values())
+        self.step = step
+        self.kernel = kernel
+        self.dtype = np.dtype(dtype)
+        self.completed = set()
+
+        header = _read_header(path)
+        if header is not None and self._matches(header):
+            self.step = header['step']
+            self.completed = _read_chunks(path)
+            self.data = np.lib.format.open_memmap(path, mode='r+')
+        else:
+            self.data = np.lib.format.open_memmap(path, mode='w+', dtype=self.dtype, shape=self.shape)
+            self._write_header()
+
+    def _matches(self, header):
+        return (
+            os.path.exists(self.path)
+            and header.get('kernel') == self.kernel
+            and header.get('dtype') == self.dtype.str
+            and header.get('axes') == {k: v.tolist() for k, v in self.axes.items()}
+        )
+
+    def _write_header(self):
+        header = {
+            'axes': {k: v.tolist() for k, v in self.axes.items()},
+            'step': self.step,
+            'kernel': self.kernel,
+            'dtype': self.dtype.str,
+        }
+        tmp = self.path+'.json.tmp'
+        with open(tmp, 'w') as fh:
+            json.dump(header, fh)
+        # the chunks log is emptied before the header states the new content
+        open(self.path+'.chunks', 'w').close()
+        os.replace(tmp, self.path+'.json')
+
+    @property
+    def done(self):
+        return sum(stop-start for start, stop in self.completed) == self.data.size
+
+    def write(self, start, stop, values):
+        """Stores a chunk of the flattened grid and records it as completed"""
+        self.data.reshape(-1)[start:stop] = values
+        self.data.flush()
+        self.completed.add((start, stop))
+        with open(self.path+'.chunks', 'a') as fh:
+            fh.write(f'{start} {stop}\n')
+
+
+def _read_header(path):
+    try:
+        with open(path+'.json', 'r') as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _read_chunks(path):
+    """Completed chunks of a stored sweep (an interrupted last line is ignored)"""
+    completed = set()
+    try:
+        with open(path+'.chunks', 'r') as fh:
+            for line in fh:
+                fields = line.split()
+                if line.endswith('\n') and len(fields) == 2:
+                    completed.add((int(fields[0]), int(fields[1])))
+    except OSError:
+        pass
+    return completed
+
+
+def load_sweep(path):
+    """Opens a sweep saved by Solver.sweep_to_file
+
+    Returns the (read-only, memory-mapped) results, the axes as an ordered
+    {name: values} dict and whether the sweep was complete.
+    """
+    header = _read_header(path)
+    if header is None:
+        raise OSError(f'No sweep header found for "{path}"')
+    data = np.load(path, mmap_mode='r')
+    complete = sum(stop-start for start, stop in _read_chunks(path)) == data.size
+    return data, {k: np.array(v) for k, v in header['axes'].items()}, complete
@@ -0,0 +1,112 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# system.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+import sympy as sp
+
+
+class BlockSystem(object):
+    """Block-sparse storage of the global system (Allard & Atalla, 2009, eq. 11.79)
+
+    Columns are grouped by state vector (saturating medium first, then one per
+    layer) and each block row only stores its non-zero blocks, indexed by the
+    state vector they multiply.
+    """
+
+    def __init__(self, sv_lengths):
+        self.sv_lengths = list(sv_lengths)
+        self.rows = []
+        self.row_keys = []
+
+    def add_row(self, blocks, key=None):
+        """Appends a block row given as a {state vector index: matrix} dict
+
+        key -- optional hashable identifying the content of the row, rows with
+               keys allow the partial eliminations to be reused (see sweep)
+        """
+        heights = set(B.shape[0] for B in blocks.values())
+        if len(heights) != 1:
+            raise ValueError('All the blocks of a row must have the same height')
+        for i_sv, B in blocks.items():
+            if B.shape[1] != self.sv_lengths[i_sv]:
+                raise ValueError(f'Block width does not match state vector {i_sv}')
+        self.rows.append(dict(blocks))
+        self.row_keys.append(key)
+
+    @property
+    def shape(self):
+        return (
+            sum(next(iter(R.values())).shape[0] for R in self.rows),
+            sum(self.sv_lengths)
+        )
+
+    def to_dense(self):
+        """Assembles the equivalent dense matrix"""
+        A = sp.zeros(*self.shape)
+        offsets = [sum(self.sv_lengths[:i]) for i in range(len(self.sv_lengths))]
+        row_index = 0
+        for R in self.rows:
+            for i_sv, B in R.items():
+                A[row_index:row_index+B.shape[0], offsets[i_sv]:offsets[i_sv]+B.shape[1]] = B
+            row_index += next(iter(R.values())).shape[0]
+        return A
+
+    def sweep(self, memo=None):
+        """Block elimination from the backing up to the first state vector
+
+        The system must be block-bidiagonal: row k couples state vectors k and
+        k+1 (interface I_k, J_k*M_k blocks) and the last row only holds the
+        backing conditions on the last state vector. Returns a matrix whose
+        columns span the admissible values of the first state vector.
+
+        memo -- optional LRUCache of the partial eliminations, indexed by the
+                keys of the rows they were computed from: when rows are keyed,
+                the longest already eliminated suffix of the system is reused.
+        """
+        *interfaces, backing = self.rows
+        N = len(interfaces)
+        if list(backing.keys()) != [N]:
+            raise ValueError('The last row must only constrain the last state vector')
+        if memo is not None and None in self.row_keys:
+            memo = None
+
+        S, start = None, N
+        if memo is not None:
+            for k in range(N+1):
+                S = memo.get(tuple(self.row_keys[k:]))
+                if S is not None:
+                    start = k
+                    break
+        if S is None:
+            S = sp.Matrix.hstack(*backing[N].nullspace())
+            if memo is not None:
+                memo.put(tuple(self.row_keys[N:]), S)
+
+        for k in range(start-1, -1, -1):
+            if sorted(interfaces[k].keys()) != [k, k+1]:
+                raise ValueError('The system is not block-bidiagonal')
+            I, JM = interfaces[k][k], interfaces[k][k+1]
+            if I.shape[0] != I.shape[1]:
+                raise NotImplementedError('Only square interface matrices are supported')
+            rhs = -JM*S
+            S = rhs if I == sp.eye(I.shape[0]) else I.LUsolve(rhs)
+            if memo is not None:
+                memo.put(tuple(self.row_keys[k:]), S)
+        return S
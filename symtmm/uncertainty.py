@@ -0,0 +1,351 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# uncertainty.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+import numpy as np
+
+from symtmm.runtime import numeric_kernel
+from symtmm.sweep import bounded_map
+from symtmm.acoustics import absorption
+
+
+# Sobol direction numbers (Joe & Kuo, 2008, new-joe-kuo-6.21201), dimensions
+# 2 to 21 as (degree s, coefficients a, initial numbers m_1..m_s)
+_JOE_KUO = [
+    (1, 0, (1,)),
+    (2, 1, (1, 3)),
+    (3, 1, (1, 3, 1)),
+    (3, 2, (1, 1, 1)),
+    (4, 1, (1, 1, 3, 3)),
+    (4, 4, (1, 3, 5, 13)),
+    (5, 2, (1, 1, 5, 5, 17)),
+    (5, 4, (1, 1, 5, 5, 5)),
+    (5, 7, (1, 1, 7, 11, 19)),
+    (5, 11, (1, 1, 5, 1, 1)),
+    (5, 13, (1, 1, 1, 3, 11)),
+    (5, 14, (1, 3, 5, 5, 31)),
+    (6, 1, (1, 3, 3, 9, 7, 49)),
+    (6, 13, (1, 1, 1, 15, 21, 21)),
+    (6, 16, (1, 3, 1, 13, 27, 49)),
+    (6, 19, (1, 1, 1, 15, 7, 5)),
+    (6, 22, (1, 3, 1, 15, 13, 25)),
+    (6, 25, (1, 1, 5, 5, 19, 61)),
+    (7, 1, (1, 3, 7, 11, 23, 15, 103)),
+    (7, 4, (1, 3, 7, 13, 13, 15, 69)),
+]
+_SOBOL_BITS = 32
+
+
+def _direction_numbers(dims):
+    """(dims, _SOBOL_BITS) direction numbers, scaled to 32 bits integers"""
+    if dims > len(_JOE_KUO)+1:
+        raise ValueError(f'Sobol sequences are limited to {len(_JOE_KUO)+1} dimensions')
+    V = np.zeros((dims, _SOBOL_BITS), dtype=np.uint64)
+    # first dimension: van der Corput
+    V[0] = [1 << (_SOBOL_BITS-1-k) for k in range(_SOBOL_BITS)]
+    for i_d in range(1, dims):
+        s, a, m = _JOE_KUO[i_d-1]
+        v = [m[k] << (_SOBOL_BITS-1-k) for k in range(s)]
+        for k in range(s, _SOBOL_BITS):
+            value = v[k-s] ^ (v[k-s] >> s)
+            for j in range(1, s):
+                value ^= ((a >> (s-1-j)) & 1)*v[k-j]
+            v.append(value)
+        V[i_d] = v
+    return V
+
+
+def sobol(start, stop, dims, seed=None):
+    """Points [start, stop) of the Sobol sequence in [0, 1)^dims
+
+    Points are computed from their index (gray code), so that any range of
+    the sequence can be generated independently. With a seed, the sequence
+    is randomized by a digital shift (which keeps its equidistribution).
+    """
+    V = _direction_numbers(dims)
+    index = np.arange(start, stop, dtype=np.uint64)
+    gray = index ^ (index >> np.uint64(1))
+    x = np.zeros((index.size, dims), dtype=np.uint64)
+    for k in range(_SOBOL_BITS):
+        bit = ((gray >> np.uint64(k)) & np.uint64(1)).astype(bool)
+        x[bit] ^= V[:, k]
+    if seed is not None:
+        shift = np.random.RandomState(seed).randint(0, 2**_SOBOL_BITS, size=dims, dtype=np.uint64)
+        x ^= shift
+    return (x.astype(float)+0.5)/2.**_SOBOL_BITS
+
+
+def latin_hypercube(n, dims, seed=0):
+    """n points in [0, 1)^dims, one per stratum along every dimension"""
+    rand = np.random.RandomState(seed)
+    strata = np.argsort(rand.uniform(size=(dims, n)), axis=1).T
+    return (strata+rand.uniform(size=(n, dims)))/n
+
+
+def _norm_ppf(p):
+    """Inverse of the standard normal CDF (Acklam's rational approximation, |error| < 1.2e-9)"""
+    a = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+         1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+    b = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+         6.680131188771972e+01, -1.328068155288572e+01)
+    c = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+         -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+    d = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+         3.754408661907416e+00)
+
+    p = np.asarray(p, dtype=float)
+    x = np.empty_like(p)
+    low, high = p < 0.02425, p > 1-0.02425
+    mid = ~(low | high)
+
+    q = np.sqrt(-2*np.log(p[low]))
+    x[low] = (((((c[0]*q+c[1])*q+c[2])*q+c[3])*q+c[4])*q+c[5]) / ((((d[0]*q+d[1])*q+d[2])*q+d[3])*q+1)
+    q = np.sqrt(-2*np.log(1-p[high]))
+    x[high] = -(((((c[0]*q+c[1])*q+c[2])*q+c[3])*q+c[4])*q+c[5]) / ((((d[0]*q+d[1])*q+d[2])*q+d[3])*q+1)
+    q = p[mid]-0.5
+    r = q*q
+    x[mid] = (((((a[0]*r+a[1])*r+a[2])*r+a[3])*r+a[4])*r+a[5])*q \
+        / (((((b[0]*r+b[1])*r+b[2])*r+b[3])*r+b[4])*r+1)
+    return x
+
+
+class Uniform(object):
+
+    def __init__(self, low, high):
+        self.low, self.high = low, high
+
+    def ppf(self, u):
+        return self.low+(self.high-self.low)*u
+
+
+class Normal(object):
+
+    def __init__(self, mean, std):
+        self.mean, self.std = mean, std
+
+    def ppf(self, u):
+        return self.mean+self.std*_norm_ppf(u)
+
+
+class LogNormal(object):
+    """Log-normal distribution, given by its median and the std of its log"""
+
+    def __init__(self, median, sigma):
+        self.median, self.sigma = median, sigma
+
+    def ppf(self, u):
+        return self.median*np.exp(self.sigma*_norm_ppf(u))
+
+
+class _Statistics(object):
+    """Mergeable summary of the outputs of a set of samples
+
+    Mean and variance are accumulated with Chan et al.'s pairwise update,
+    quantiles from fixed-bin histograms over bounds (if given).
+    """
+
+    def __init__(self, shape, bounds=None, bins=1000):
+        self.count = 0
+        self.mean = np.zeros(shape)
+        self.M2 = np.zeros(shape)
+        self.bounds = bounds
+        self.bins = bins
+        self.histogram = np.zeros(shape+(bins,), dtype=np.int64) if bounds is not None else None
+
+    def add(self, y):
+        """Adds the outputs of samples stacked along the first axis"""
+        n = y.shape[0]
+        mean = np.mean(y, axis=0)
+        M2 = np.sum((y-mean)**2, axis=0)
+        self.merge_moments(n, mean, M2)
+        if self.histogram is not None:
+            lo, hi = self.bounds
+            bins = np.clip(((y-lo)/(hi-lo)*self.bins).astype(np.int64), 0, self.bins-1)
+            flat = np.arange(self.mean.size).reshape(self.mean.shape)*self.bins+bins
+            self.histogram += np.bincount(flat.ravel(), minlength=self.histogram.size).reshape(self.histogram.shape)
+
+    def merge_moments(self, n, mean, M2):
+        total = self.count+n
+        delta = mean-self.mean
+        self.mean = self.mean+delta*n/total
+        self.M2 = self.M2+M2+delta**2*self.count*n/total
+        self.count = total
+
+    def merge(self, other):
+        self.merge_moments(other.count, other.mean, other.M2)
+        if self.histogram is not None:
+            self.histogram += other.histogram
+
+
+class UncertaintyResult(object):
+    """Summary statistics of an uncertainty propagation (see propagate)"""
+
+    def __init__(self, names, statistics, sensitivity=None):
+        self.names = names
+        self.n_samples = statistics.count
+        self.mean = statistics.mean
+        self.variance = statistics.M2/max(statistics.count-1, 1)
+        self._statistics = statistics
+        self.first_order, self.total_order = sensitivity if sensitivity is not None else (None, None)
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    def quantile(self, q):
+        """Quantile q of the outputs (resolution: bounds range/bins)"""
+        stats = self._statistics
+        if stats.histogram is None:
+            raise ValueError('Quantiles are only tracked when bounds are given')
+        lo, hi = stats.bounds
+        cdf = np.cumsum(stats.histogram, axis=-1)/stats.count
+        i_bin = np.minimum(np.sum(cdf < q, axis=-1), stats.bins-1)
+        index = tuple(np.indices(i_bin.shape))
+        below = np.where(i_bin > 0, cdf[index+(np.maximum(i_bin-1, 0),)], 0.)
+        inside = cdf[index+(i_bin,)]-below
+        frac = np.where(inside > 0, (q-below)/np.where(inside > 0, inside, 1), 0.5)
+        return lo+(hi-lo)*(i_bin+np.clip(frac, 0, 1))/stats.bins
+
+    def band(self, level=0.95):
+        """(lower, upper) bounds of the central interval holding level of the outputs"""
+        return self.quantile((1-level)/2), self.quantile((1+level)/2)
+
+
+def _outputs(func, args, quantity, Z, theta):
+    Zs = func(*args)
+    if quantity == 'absorption':
+        return absorption(Zs, Z, theta)
+    return quantity(Zs)
+
+
+def evaluate_samples(source, names, distributions, fixed, u, quantity, Z, theta, shape, bounds, bins, sensitivity,
+                     backend='numpy', precision='complex128'):
+    """Statistics of the outputs for a chunk of unit hypercube samples (runs in workers)
+
+    u -- (n, d) samples (or (n, 2d) with sensitivity, A and B matrices side by side)
+
+    Returns the _Statistics of the chunk and, with sensitivity, the sums the
+    Saltelli/Jansen estimators are computed from.
+    """
+    func, _ = numeric_kernel(source, 'Zs', len(names), backend, precision)
+    d = len(distributions)
+    extra = (np.newaxis,)*len(shape)
+
+    def outputs(u_):
+        drawn = {k: dist.ppf(u_[:, i_k])[(slice(None),)+extra] for i_k, (k, dist) in enumerate(distributions)}
+        args = [drawn[_] if _ in drawn else fixed[_][np.newaxis, ...] for _ in names]
+        th = drawn.get('theta', fixed.get('theta', theta))
+        return np.broadcast_to(_outputs(func, args, quantity, Z, th), (u_.shape[0],)+shape)
+
+    stats = _Statistics(shape, bounds, bins)
+    if not sensitivity:
+        stats.add(outputs(u))
+        return stats, None
+
+    A, B = u[:, :d], u[:, d:]
+    fA, fB = outputs(A), outputs(B)
+    stats.add(fA)
+    stats.add(fB)
+    first, total = np.zeros((d,)+shape), np.zeros((d,)+shape)
+    for i in range(d):
+        AB = A.copy()
+        AB[:, i] = B[:, i]
+        fAB = outputs(AB)
+        first[i] = np.sum(fB*(fAB-fA), axis=0)
+        total[i] = np.sum((fA-fAB)**2, axis=0)
+    return stats, (fA.shape[0], first, total)
+
+
+def propagate(source, params, distributions, fixed, n_samples, method='sobol', quantity='absorption',
+              Z=None, theta=0., bounds=None, bins=1000, sensitivity=False, chunk=4096, executor=None, seed=0,
+              backend='numpy', precision='complex128'):
+    """Monte Carlo / quasi-Monte Carlo propagation of parameter uncertainties
+
+    source -- generated Zs kernel, params -- names of its arguments
+    distributions -- ordered {parameter name: distribution} (objects with a
+                     ppf method, e.g. Uniform, Normal, LogNormal)
+    fixed -- {parameter name: values} for the other parameters, broadcast
+             against each other (e.g. omega); the outputs have their shape
+    method -- 'sobol' (randomized), 'lhs' or 'random' ('lhs' stratifies each
+              chunk separately: every chunk is a Latin hypercube of its own)
+    quantity -- 'absorption' or a function of Zs returning real values
+    bounds -- range of the outputs histograms quantiles are computed from
+              (defaults to (0, 1) for absorption, no quantiles otherwise)
+    sensitivity -- also computes first order (Saltelli, 2010) and total
+                   (Jansen) indices, with n_samples*(d+2) evaluations
+    chunk -- number of samples evaluated at once
+    executor -- optional concurrent.futures executor the chunks are sent to
+    backend, precision -- evaluation mode of the kernel, see
+                          symtmm.runtime.numeric_kernel
+
+    Samples are drawn, evaluated and summarized chunk by chunk: only the
+    statistics are kept in memory. Returns an UncertaintyResult.
+    """
+
+    distributions = list(distributions.items())
+    unknown = [k for k, _ in distributions if k not in params]
+    if unknown:
+        raise KeyError(f'{", ".join(unknown)} not parameters of the compiled function')
+    missing = [_ for _ in params if _ not in fixed and _ not in dict(distributions)]
+    if missing:
+        raise KeyError(f'No value given for {", ".join(missing)}')
+    if quantity == 'absorption' and bounds is None:
+        bounds = (0., 1.)
+
+    fixed = {k: np.asarray(v, dtype=float) for k, v in fixed.items()}
+    shape = np.broadcast(*fixed.values()).shape if fixed else ()
+    fixed = dict(zip(fixed.keys(), np.broadcast_arrays(*fixed.values())))
+    d = len(distributions)
+    dims = 2*d if sensitivity else d
+
+    if method not in ('sobol', 'lhs', 'random'):
+        raise ValueError(f'Unknown sampling method "{method}"')
+    rand = np.random.RandomState(seed)
+
+    def samples(start, stop):
+        if method == 'sobol':
+            return sobol(start, stop, dims, seed)
+        elif method == 'lhs':
+            # one hypercube per chunk, so that memory does not grow with n_samples
+            return latin_hypercube(stop-start, dims, None if seed is None else [seed, start])
+        return rand.uniform(size=(stop-start, dims))
+
+    job = (source, list(params), distributions, fixed)
+    options = (quantity, Z, theta, shape, bounds, bins, sensitivity, backend, precision)
+    ranges = [(start, min(start+chunk, n_samples)) for start in range(0, n_samples, chunk)]
+    if executor is None:
+        results = (evaluate_samples(*job, samples(*r), *options) for r in ranges)
+    else:
+        results = bounded_map(executor, evaluate_samples, (job+(samples(*r),)+options for r in ranges))
+
+    stats = _Statistics(shape, bounds, bins)
+    first, total, n = 0., 0., 0
+    for chunk_stats, sums in results:
+        stats.merge(chunk_stats)
+        if sums is not None:
+            n += sums[0]
+            first, total = first+sums[1], total+sums[2]
+
+    indices = None
+    if sensitivity:
+        variance = stats.M2/max(stats.count-1, 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            indices = (first/n/variance, total/(2*n)/variance)
+    return UncertaintyResult([k for k, _ in distributions], stats, indices)
@@ -0,0 +1,51 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# conftest.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+import pytest
+
+from symtmm import Solver, Layer, Eqf
+from symtmm.backing import rigid
+
+
+FOAM = {
+    'name': 'foam', 'phi': 0.98, 'sigma': 13500., 'alpha': 1.7, 'Lambda_prime': 160e-6,
+    'Lambda': 80e-6, 'rho_1': 30., 'nu': 0.3, 'E': 1e5, 'eta': 0.1,
+}
+
+
+@pytest.fixture(scope='session')
+def eqf_stack():
+    """Factory of rigidly backed solvers made of Eqf layers
+
+    thicknesses -- one per layer
+    definitions -- optional per layer overrides of FOAM
+    """
+
+    def make(thicknesses, definitions=None):
+        definitions = definitions if definitions is not None else [{}]*len(thicknesses)
+        solver = Solver(backing=rigid)
+        for thickness, definition in zip(thicknesses, definitions):
+            medium = Eqf(solver.Gref)
+            medium.from_dict(dict(FOAM, **definition))
+            solver.layers.append(Layer(medium, thickness))
+        return solver
+
+    return make
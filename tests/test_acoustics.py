@@ -0,0 +1,48 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# test_acoustics.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+import numpy as np
+
+from symtmm.acoustics import paris_quadrature, diffuse_absorption
+
+
+def test_paris_quadrature():
+    thetas, weights = paris_quadrature(8)
+    assert np.all((thetas > 0) & (thetas < np.pi/2))
+    np.testing.assert_allclose(np.sum(weights), 1., rtol=1e-14)
+    # sin(2 theta) weighted mean of cos^2 over [0, pi/2]
+    np.testing.assert_allclose(np.sum(weights*np.cos(thetas)**2), 0.5, rtol=1e-10)
+    # over [0, pi/4]: int cos^2 sin(2 theta) = 3/8, int sin(2 theta) = 1/2
+    thetas, weights = paris_quadrature(8, np.pi/4)
+    np.testing.assert_allclose(np.sum(weights*np.cos(thetas)**2), 0.75, rtol=1e-10)
+
+
+def test_diffuse_absorption_of_rigid_and_matched_surfaces():
+    Z = 413.
+    omega = np.linspace(100, 1000, 5)[:, np.newaxis]
+    # the angles come along the trailing axis
+    rigid = diffuse_absorption(lambda thetas: np.full(np.broadcast(omega, thetas).shape, 1e30+0j), Z)
+    np.testing.assert_allclose(rigid, 0., atol=1e-12)
+    assert rigid.shape == (5,)
+
+    # Zs = Z/cos(theta) absorbs everything at every angle
+    matched = diffuse_absorption(lambda thetas: Z/np.cos(thetas)+0*omega, Z)
+    np.testing.assert_allclose(matched, 1., rtol=1e-12)
@@ -0,0 +1,65 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# test_batch.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+from symtmm.batch import build_solver, compile_stacks
+from symtmm import NumericSolver
+
+from conftest import FOAM
+
+
+def definition(thicknesses, params=('omega', 'theta')):
+    return {
+        'layers': [{'medium': dict(FOAM, medium_type='eqf'), 'thickness': d} for d in thicknesses],
+        'params': list(params),
+    }
+
+
+@pytest.fixture(scope='module')
+def executor():
+    with ProcessPoolExecutor(2) as executor:
+        yield executor
+
+
+def test_failures_are_isolated(executor):
+    definitions = [definition([0.05]), definition([0.05], ['omega', 'nope']), definition([0.02, 0.03])]
+    results = compile_stacks(definitions, executor=executor)
+
+    assert [_.ok for _ in results] == [True, False, True]
+    assert results[1].kernel is None and results[1].error.startswith('KeyError')
+    w = np.linspace(100, 1e4, 20)
+    for result in (results[0], results[2]):
+        expected = NumericSolver.from_solver(build_solver(result.definition)).Zs(w, 0.2)
+        np.testing.assert_allclose(result.kernel(omega=w, theta=0.2), expected, rtol=1e-10)
+        assert result.time > 0
+
+
+def test_timeout(executor):
+    results = compile_stacks([definition([0.01]*4)]*2, executor=executor, timeout=1e-3)
+    assert all(_.error.startswith('CompileTimeout') for _ in results)
+
+    # the workers are still usable
+    result, = compile_stacks([definition([0.05])], executor=executor, timeout=60)
+    assert result.ok
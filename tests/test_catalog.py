@@ -0,0 +1,80 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# test_catalog.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+import os
+
+import numpy as np
+
+from symtmm import Layer, NumericSolver
+from symtmm.catalog import MaterialCatalog
+from conftest import FOAM
+
+
+def foam(name, sigma):
+    return ''.join(f'{k}: {v}\n' for k, v in dict(FOAM, name=name, medium_type='eqf', sigma=sigma).items())
+
+
+def test_document_markers(tmpdir):
+    path = str(tmpdir.join('foams.yaml'))
+    with open(path, 'w') as fh:
+        fh.write('# leading comment\n'+foam('a', 10000.))
+        fh.write('--- # with a comment\n'+foam('b', 20000.)+'...\n')
+        fh.write('--- !!map\n'+foam('c', 30000.)+'...\n')
+        fh.write('---\n'+foam('d', 40000.))
+    catalog = MaterialCatalog(path)
+    assert catalog.names() == ['a', 'b', 'c', 'd']
+    assert [catalog.record(_)['sigma'] for _ in 'abcd'] == [10000., 20000., 30000., 40000.]
+
+
+def test_index_is_rebuilt(tmpdir):
+    path = str(tmpdir.join('foams.yaml'))
+    with open(path, 'w') as fh:
+        fh.write('---\n'+foam('a', 10000.))
+    assert MaterialCatalog(path).names() == ['a']
+    assert os.path.exists(path+'.index.json')
+
+    with open(path, 'a') as fh:
+        fh.write('---\n'+foam('b', 20000.))
+    os.utime(path, (0, 0))
+    catalog = MaterialCatalog(path)
+    assert catalog.names() == ['a', 'b']
+    assert catalog.record('b')['sigma'] == 20000.
+
+
+def test_screen(tmpdir, eqf_stack):
+    path = str(tmpdir.join('foams.yaml'))
+    sigmas = [5000., 13500., 40000.]
+    with open(path, 'w') as fh:
+        for i, sigma in enumerate(sigmas):
+            fh.write('---\n'+foam(f'foam{i}', sigma))
+    catalog = MaterialCatalog(path)
+
+    solver = eqf_stack([0.05])
+    medium = solver.layers[0].medium
+    solver.lambdify([solver.Gref['syms']['omega'], medium.sigma, medium.phi], {'theta': 0.})
+    w = np.linspace(100, 5000, 20)
+    names, Zs = catalog.screen(solver, {'omega': w})
+    assert names == ['foam0', 'foam1', 'foam2'] and Zs.shape == (3, 20)
+
+    for name, Z in zip(names, Zs):
+        reference = eqf_stack([0.05])
+        reference.layers = [Layer(catalog.medium(name, reference.Gref), 0.05)]
+        np.testing.assert_allclose(Z, NumericSolver.from_solver(reference).Zs(w), rtol=1e-10)
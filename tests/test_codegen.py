@@ -0,0 +1,42 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# test_codegen.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+import numpy as np
+import sympy as sp
+
+from symtmm.codegen import generate_outputs_source
+from symtmm.runtime import compile_source
+
+
+def test_outputs_written_in_place():
+    x, y = sp.symbols('x y')
+    exprs = [x/(x+y), x-2*y, sp.sqrt(x*y), sp.exp(x)*y, 1/x, (x+y)**3, sp.cos(x*y), x]
+    func = compile_source(generate_outputs_source('outputs', [x, y], exprs)[0], 'outputs')
+    xv, yv = np.linspace(0.1, 2, 7)[:, np.newaxis], np.linspace(0.5, 3, 3)
+    expected = [sp.lambdify([x, y], _, 'numpy')(xv, yv) for _ in exprs]
+
+    for r, e in zip(func(xv, yv), expected):
+        np.testing.assert_allclose(r, e, rtol=1e-14)
+    out = [np.empty((7, 3)) for _ in exprs]
+    results = func(xv, yv, out=out)
+    assert all(r is o for r, o in zip(results, out))
+    for r, e in zip(results, expected):
+        np.testing.assert_allclose(r, np.broadcast_to(e, (7, 3)), rtol=1e-14)
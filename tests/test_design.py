@@ -0,0 +1,84 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# test_design.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+import itertools
+
+import numpy as np
+import pytest
+
+from symtmm import NumericSolver, Layer, Air
+from symtmm.backing import rigid
+from symtmm.acoustics import absorption, paris_quadrature
+from symtmm.design import DesignExplorer
+
+
+@pytest.fixture(scope='module')
+def options(eqf_stack):
+    solver = eqf_stack([0.01, 0.02, 0.04], [{'sigma': 5000.}, {'sigma': 20000.}, {'sigma': 60000.}])
+    layers = dict(zip(['light', 'medium', 'dense'], solver.layers))
+    layers['gap'] = Layer(Air(solver.Gref), 0.015)
+    return layers
+
+
+def reference(options, stack, omega, theta):
+    numeric = NumericSolver([options[_] for _ in stack], rigid)
+    return absorption(numeric.Zs(omega, theta), numeric.sat_med.V['Z'], theta)
+
+
+def test_absorption(options):
+    omega = 2*np.pi*np.geomspace(100, 5000, 30)
+    explorer = DesignExplorer(options, rigid, omega, 0.3)
+    stacks = [('dense',), ('light', 'gap', 'dense'), ('medium', 'light', 'gap'), ('gap', 'medium', 'gap', 'dense')]
+    for stack, alpha in explorer.evaluate(stacks).items():
+        np.testing.assert_allclose(alpha, reference(options, stack, omega, 0.3), rtol=1e-9, atol=1e-12)
+    # every sub-stack from the backing is computed once: 'dense' and
+    # 'gap', 'dense' are shared
+    assert explorer.stats['products'] == 1+2+3+2
+    assert explorer.stats['layer_matrices'] == 4
+
+    diffuse = DesignExplorer(options, rigid, omega, 'diffuse', nodes=12)
+    thetas, weights = paris_quadrature(12)
+    expected = np.sum(reference(options, ('light', 'gap', 'dense'), omega[:, np.newaxis], thetas)*weights, axis=-1)
+    np.testing.assert_allclose(diffuse.absorption(('light', 'gap', 'dense')), expected, rtol=1e-9)
+
+
+def test_search_is_the_thinnest_stack(options):
+    omega = 2*np.pi*np.geomspace(500, 4000, 12)
+    explorer = DesignExplorer(options, rigid, omega)
+    target = 0.6
+
+    best = None
+    for n in range(1, 4):
+        for stack in itertools.product(options, repeat=n):
+            if any(a == b for a, b in zip(stack, stack[1:])):
+                continue
+            thickness = sum(options[_].V_thickness for _ in stack)
+            if (best is None or thickness < best[0]) and np.all(reference(options, stack, omega, 0.) >= target):
+                best = (thickness, stack)
+    assert best is not None
+
+    result = explorer.search(target, max_layers=3)
+    np.testing.assert_allclose(result.thickness, best[0])
+    assert np.all(reference(options, result.stack, omega, 0.) >= target)
+    np.testing.assert_allclose(result.absorption, reference(options, result.stack, omega, 0.), rtol=1e-9)
+    assert result.stats['pruned'] > 0
+
+    assert explorer.search(target, max_layers=3, max_thickness=best[0]*0.99).stack is None
@@ -0,0 +1,102 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# test_fitting.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+import numpy as np
+import pytest
+
+from symtmm.runtime import cached_kernel
+from symtmm.fitting import BatchFitter, _residuals
+
+
+@pytest.fixture(scope='module')
+def fitter(eqf_stack):
+    solver = eqf_stack([0.05])
+    medium = solver.layers[0].medium
+    return BatchFitter(solver, [medium.sigma, medium.phi], theta=0.2)
+
+
+@pytest.mark.parametrize('target', ['Zs', 'absorption'])
+def test_residual_jacobian(fitter, target):
+    kernel = cached_kernel(fitter.source, 'Zs_jac')
+    omega = 2*np.pi*np.geomspace(100, 5000, 30)[np.newaxis, :]
+    Zs = kernel(omega, np.array([[20000.]]), np.array([[0.9]]))[0]
+    measured = Zs if target == 'Zs' else 1-np.abs((Zs*np.cos(0.2)-413.)/(Zs*np.cos(0.2)+413.))**2
+    args = (kernel, omega, measured, target, 413., 0.2, fitter.log_bounds)
+
+    u = np.random.RandomState(0).uniform(-1.5, 1.5, size=(4, 2))
+    _, J = _residuals(*args, u)
+    h = 1e-6
+    for k in range(u.shape[1]):
+        du = np.zeros_like(u)
+        du[:, k] = h
+        fd = (_residuals(*args, u+du)[0]-_residuals(*args, u-du)[0])/(2*h)
+        assert np.max(np.abs(J[..., k]-fd)) <= 1e-6*np.max(np.abs(fd))
+
+
+def test_fit_absorption(fitter):
+    omega = 2*np.pi*np.geomspace(100, 5000, 40)
+    Zs = fitter.solver.Zs_jac_func(omega, 20000., 0.9)[0]
+    Z = fitter.solver.sat_med.V['Z']
+    measured = 1-np.abs((Zs*np.cos(0.2)-Z)/(Zs*np.cos(0.2)+Z))**2
+
+    result = fitter.fit(omega, measured[np.newaxis], target='absorption', initial=[15000., 0.95], n_starts=2)
+    assert result.converged[0]
+    assert result.cost[0] < 1e-12
+    np.testing.assert_allclose(result.params[0], [20000., 0.9], rtol=1e-4)
+
+
+def test_fit_status(fitter):
+    omega = 2*np.pi*np.geomspace(100, 5000, 40)
+    measured = fitter.solver.Zs_jac_func(omega, 20000., 0.9)[0][np.newaxis]
+    options = dict(initial=[15000., 0.95], n_starts=2, max_iter=300)
+
+    result = fitter.fit(omega, measured, **options)
+    assert result.converged[0] and not result.stalled[0]
+    # without a tolerance, the exact fit can only end in a stall
+    result = fitter.fit(omega, measured, tol=0., **options)
+    assert result.stalled[0] and not result.converged[0]
+    np.testing.assert_allclose(result.params[0], [20000., 0.9], rtol=1e-8)
+    # out of iterations
+    result = fitter.fit(omega, measured, **dict(options, max_iter=2))
+    assert not result.converged[0] and not result.stalled[0]
+
+
+def test_executor_groups(fitter, monkeypatch):
+    import symtmm.fitting
+    from concurrent.futures import ThreadPoolExecutor
+
+    fit_samples = symtmm.fitting.fit_samples
+    calls = []
+
+    def spy(*args):
+        calls.append(len(args[2]))
+        return fit_samples(*args)
+
+    monkeypatch.setattr(symtmm.fitting, 'fit_samples', spy)
+    omega = 2*np.pi*np.geomspace(100, 5000, 40)
+    measured = np.repeat(fitter.solver.Zs_jac_func(omega, 20000., 0.9)[0][np.newaxis], 5, axis=0)
+
+    with ThreadPoolExecutor(3) as executor:
+        result = fitter.fit(omega, measured, initial=[15000., 0.95], n_starts=2, executor=executor)
+    # one group per worker
+    assert sorted(calls) == [3, 3, 4]
+    assert np.all(result.converged)
+    np.testing.assert_allclose(result.params, [[20000., 0.9]]*5, rtol=1e-6)
@@ -0,0 +1,41 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# test_media.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+import numpy as np
+
+from symtmm.media import medium_from_dict
+
+
+def test_fluid_derived_values():
+    helium = medium_from_dict({}, {'medium_type': 'fluid', 'name': 'helium', 'rho': '0.166', 'gamma': 1.66})
+    c = np.sqrt(1.66*1.01325e5/0.166)
+    assert np.isclose(helium.V['c'], c)
+    assert np.isclose(helium.V['Z'], 0.166*c)
+    assert np.isclose(helium.V['nu'], helium.V['mu']/0.166)
+
+    # explicitly given derived values are kept
+    fluid = medium_from_dict({}, {'medium_type': 'fluid', 'rho': 1.2, 'c': 340.})
+    assert fluid.V['c'] == 340. and np.isclose(fluid.V['Z'], 1.2*340.)
+
+    # frequency dependent values follow the derived ones
+    omega = 2*np.pi*np.array([100., 1000.])
+    values = helium.update_frequency(omega)
+    assert np.allclose(values['c'], c) and np.allclose(values['Z'], 0.166*c)
@@ -0,0 +1,79 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# test_numeric.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+import numpy as np
+import pytest
+
+from symtmm import Solver, NumericSolver, Layer, Eqf, Air
+from symtmm.backing import rigid
+from symtmm.design import DesignExplorer
+from symtmm.media import medium_from_dict
+
+from conftest import FOAM
+
+
+def test_saturating_medium_of_the_media():
+    helium = medium_from_dict({}, {'medium_type': 'fluid', 'rho': 0.166, 'gamma': 1.66})
+    solver = Solver(backing=rigid, saturating_medium=helium)
+    medium = Eqf(solver.Gref)
+    medium.from_dict(FOAM)
+    solver.layers.append(Layer(medium, 0.05))
+    omega, theta = solver.Gref['syms']['omega'], solver.Gref['syms']['theta']
+    w = np.linspace(100, 1e4, 50)
+    expected = solver.lambdify([omega, theta], {})(w, 0.4)
+
+    # the saturating medium is the one the layers were defined with
+    numeric = NumericSolver(solver.layers, rigid)
+    assert numeric.sat_med is helium
+    np.testing.assert_allclose(numeric.Zs(w, 0.4), expected, rtol=1e-10)
+    explorer = DesignExplorer({'foam': solver.layers[0]}, rigid, w, 0.4)
+    Zs = expected*np.cos(0.4)
+    np.testing.assert_allclose(explorer.absorption(['foam']), 1-np.abs((Zs-helium.V['Z'])/(Zs+helium.V['Z']))**2, rtol=1e-10)
+
+    with pytest.raises(ValueError):
+        NumericSolver(solver.layers, rigid, Air({})).Zs(w)
+
+
+def test_single_layer_closed_form(eqf_stack):
+    solver = eqf_stack([0.05])
+    medium = solver.layers[0].medium
+    omega = 2*np.pi*np.geomspace(50, 1e4, 40)[:, np.newaxis]
+    theta = np.array([0., 0.4, 1.2])
+
+    # rigidly backed fluid layer: Zs = -j omega rho/k_z cot(k_z d)
+    V_freq = medium.update_frequency(omega)
+    k_x = omega/solver.sat_med.V['c']*np.sin(theta)
+    k_z = np.sqrt((omega/V_freq['c_eq_til'])**2-k_x**2+0j)
+    expected = -1j*omega*V_freq['rho_eq_til']/k_z/np.tan(k_z*0.05)
+
+    Zs = NumericSolver.from_solver(solver).Zs(omega, theta)
+    assert Zs.shape == (40, 3)
+    np.testing.assert_allclose(Zs, expected, rtol=1e-10)
+
+
+def test_multilayer_grid_matches_solver(eqf_stack):
+    solver = eqf_stack([0.01, 0.02, 0.015], [{'sigma': 5000.}, {'sigma': 60000., 'phi': 0.9}, {}])
+    solver.layers.insert(1, Layer(Air(solver.Gref), 0.01))
+    omega, theta = solver.Gref['syms']['omega'], solver.Gref['syms']['theta']
+    w, th = 2*np.pi*np.geomspace(50, 1e4, 60)[:, np.newaxis], np.linspace(0, 1.3, 7)
+
+    expected = solver.lambdify([omega, theta], {})(w, th)
+    np.testing.assert_allclose(NumericSolver.from_solver(solver).Zs(w, th), expected, rtol=1e-9)
@@ -0,0 +1,58 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# test_profiling.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+import pytest
+
+from symtmm.batch import CompileTimeout
+from symtmm.profiling import Profiler
+
+
+def test_stage_records_and_hooks():
+    seen = []
+    profiler = Profiler(callbacks=[seen.append])
+    with profiler.stage('lambdify', n_args=3) as record:
+        record['ops'] = 12
+    assert seen == profiler.records
+    assert seen[0]['stage'] == 'lambdify'
+    assert seen[0]['n_args'] == 3 and seen[0]['ops'] == 12
+    assert seen[0]['time'] >= 0 and 'error' not in seen[0]
+
+
+@pytest.mark.parametrize('exc', [ValueError('bad stack'), CompileTimeout('Compilation timed out')])
+def test_failed_stage_is_recorded(exc):
+    seen = []
+    profiler = Profiler(callbacks=[seen.append])
+    with pytest.raises(type(exc)):
+        with profiler.stage('compile'):
+            raise exc
+    assert len(seen) == 1 and seen == profiler.records
+    assert seen[0]['error'] == f'{type(exc).__name__}: {exc}'
+    assert profiler.summary()['compile'] >= 0
+
+
+def test_history_is_capped():
+    records = []
+    profiler = Profiler(records, max_records=5)
+    for i in range(12):
+        with profiler.stage('step', i=i):
+            pass
+    assert profiler.records is records
+    assert [_['i'] for _ in records] == list(range(7, 12))
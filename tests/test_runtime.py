@@ -0,0 +1,88 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# test_runtime.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+import os
+import sys
+import subprocess
+
+import numpy as np
+import pytest
+
+import symtmm
+from symtmm.runtime import load_kernel, native_kernel, numeric_kernel
+
+
+def test_runtime_without_sympy(tmpdir, eqf_stack):
+    solver = eqf_stack([0.05])
+    solver.lambdify([solver.Gref['syms']['omega'], solver.Gref['syms']['theta']], {})
+    path = str(tmpdir.join('kernel.json'))
+    solver.export_kernel(path)
+
+    script = (
+        'import sys, symtmm, symtmm.runtime\n'
+        f'kernel = symtmm.runtime.load_kernel({path!r})\n'
+        'print(kernel(omega=1000., theta=0.2))\n'
+        'assert "sympy" not in sys.modules\n'
+    )
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(symtmm.__file__))))
+    output = subprocess.check_output([sys.executable, '-c', script], cwd=str(tmpdir), env=env)
+    assert np.isclose(complex(output.decode()), load_kernel(path)(1000., 0.2))
+
+
+def test_native_kernel(eqf_stack):
+    pytest.importorskip('numba')
+    solver = eqf_stack([0.02, 0.03])
+    omega, theta = solver.Gref['syms']['omega'], solver.Gref['syms']['theta']
+    solver.lambdify([omega, theta], {}, backend='numba')
+    assert solver.backend == 'numba'
+
+    w = np.linspace(100, 1e4, 50)
+    expected, _ = numeric_kernel(solver.Zs_source, 'Zs', 2)
+    np.testing.assert_allclose(solver.Zs_func(w, 0.2), expected(w, 0.2), rtol=1e-12)
+    single, backend = numeric_kernel(solver.Zs_source, 'Zs', 2, 'numba', 'complex64')
+    assert backend == 'numba' and single(w, 0.2).dtype == np.complex64
+    np.testing.assert_allclose(single(w, 0.2), expected(w, 0.2), rtol=1e-4)
+
+
+def test_native_compilation_failure():
+    pytest.importorskip('numba')
+    # dictionaries of a Python object are not supported in nopython mode
+    source = 'def Zs(x):\n    return {object(): x}.popitem()[1]+0j\n'
+    with pytest.warns(UserWarning, match='Native compilation failed'):
+        assert native_kernel(source, 'Zs', 1) is None
+    with pytest.warns(UserWarning, match='Native compilation failed'):
+        func, backend = numeric_kernel(source, 'Zs', 1, backend='numba')
+    assert backend == 'numpy' and func(2.) == 2.
+
+
+def test_numba_unavailable(monkeypatch, eqf_stack):
+    monkeypatch.setitem(sys.modules, 'numba', None)
+    source = 'def Zs(x, y):\n    return x+1j*y\n'
+    with pytest.warns(UserWarning, match='numba is not available'):
+        func, backend = numeric_kernel(source, 'Zs', 2, backend='numba', precision='complex64')
+    assert backend == 'numpy'
+    assert func(np.array([1., 2.]), 3.).dtype == np.complex64
+
+    solver = eqf_stack([0.05])
+    with pytest.warns(UserWarning):
+        solver.lambdify([solver.Gref['syms']['omega']], {'theta': 0.}, backend='numba')
+    assert solver.backend == 'numpy'
+    assert solver.resultset[-1]['backend'] == 'numpy'
@@ -0,0 +1,65 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# test_service.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from symtmm.runtime import Kernel
+from symtmm.service import EvaluationService
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def test_batching_and_error_isolation(eqf_stack):
+    solver = eqf_stack([0.05])
+    solver.lambdify([solver.Gref['syms']['omega']], {'theta': 0.3})
+    service = EvaluationService(batch_window=0.01)
+    service.register('foam', solver)
+    service.register('broken', Kernel('def Zs(omega):\n    raise ValueError("boom")\n', ['omega']))
+    omegas = np.linspace(100, 1e4, 50)
+
+    async def clients():
+        requests = [service.evaluate('foam', omega=w) for w in omegas]
+        requests.append(service.evaluate('foam', 'absorption', omega=omegas))
+        requests.append(service.evaluate('broken', omega=1000.))
+        results = await asyncio.gather(*requests, return_exceptions=True)
+        with pytest.raises(KeyError):
+            await service.evaluate('foam')
+        await service.close()
+        return results
+
+    results = run(clients())
+    np.testing.assert_allclose(results[:50], solver.Zs_func(omegas), rtol=1e-12)
+    Zs, Z = solver.Zs_func(omegas)*np.cos(0.3), solver.sat_med.V['Z']
+    np.testing.assert_allclose(results[50], 1-np.abs((Zs-Z)/(Zs+Z))**2, rtol=1e-12)
+    assert isinstance(results[51], ValueError)
+
+    metrics = service.metrics()
+    assert metrics['batches'] == 1 and metrics['batch_size']['max'] == 51
+    assert metrics['errors'] == 1 and metrics['points'] == 100
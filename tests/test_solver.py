@@ -0,0 +1,118 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# test_solver.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+import numpy as np
+import sympy as sp
+import pytest
+
+from symtmm import NumericSolver
+from symtmm.backing import rigid
+
+
+def pressure_release(medium):
+    return sp.Matrix([[1, 0]])
+
+
+def test_backing_change_rebuilds_system(eqf_stack):
+    solver = eqf_stack([0.05])
+    omega, theta = solver.Gref['syms']['omega'], solver.Gref['syms']['theta']
+    w = np.linspace(100, 1e4, 50)
+
+    for backing in (rigid, pressure_release):
+        solver.backing = backing
+        Zs = solver.lambdify([omega, theta], {})(w, 0.3)
+        expected = NumericSolver.from_solver(solver).Zs(w, 0.3)
+        np.testing.assert_allclose(Zs, expected, rtol=1e-10)
+
+
+def test_cache_hit_keeps_global_values(tmpdir, eqf_stack):
+    from symtmm.cache import KernelCache
+    from symtmm.uncertainty import Uniform
+
+    cache = KernelCache(str(tmpdir))
+    for _ in range(2):
+        solver = eqf_stack([0.05])
+        omega = solver.Gref['syms']['omega']
+        solver.lambdify([omega, solver.layers[0].medium.sigma], {'theta': 0.3}, cache=cache)
+    assert solver.resultset[-1] == dict(solver.resultset[-1], stage='cache_lookup', hit=True)
+
+    assert solver.V_Gref == {solver.Gref['syms']['theta']: 0.3}
+    result = solver.propagate_uncertainty({'sigma': Uniform(1e4, 2e4)}, {'omega': [500., 1000.]}, 64)
+    assert result.mean.shape == (2,)
+
+
+def test_shared_medium_symbols(eqf_stack):
+    solver = eqf_stack([0.02, 0.03], [{'sigma': 20000.}, {'sigma': 50000.}])
+    media = [L.medium for L in solver.layers]
+    omega = solver.Gref['syms']['omega']
+    w = np.linspace(100, 1e4, 50)
+
+    # folded values stay per layer
+    Zs = solver.lambdify([omega], {'theta': 0.})(w)
+    np.testing.assert_allclose(Zs, NumericSolver.from_solver(solver).Zs(w), rtol=1e-10)
+
+    # sigma would be the flow resistivity of both layers
+    with pytest.raises(ValueError):
+        solver.lambdify([omega, media[0].sigma], {'theta': 0.})
+
+    # unless they share the medium
+    solver.layers[1].medium = media[0]
+    Zs = solver.lambdify([omega, media[0].sigma], {'theta': 0.})(w, 20000.)
+    np.testing.assert_allclose(Zs, NumericSolver.from_solver(solver).Zs(w), rtol=1e-10)
+
+
+def test_cache_ignores_parameter_values(tmpdir, eqf_stack):
+    from symtmm.cache import KernelCache
+
+    cache = KernelCache(str(tmpdir))
+    w = np.linspace(100, 1e4, 50)
+    for sigma in (20000., 50000.):
+        solver = eqf_stack([0.05], [{'sigma': sigma}])
+        omega, medium = solver.Gref['syms']['omega'], solver.layers[0].medium
+        Zs = solver.lambdify([omega, medium.sigma], {'theta': 0.}, cache=cache)(w, 30000.)
+    assert solver.resultset[-1]['hit']
+
+    medium.V['sigma'] = 30000.
+    np.testing.assert_allclose(Zs, NumericSolver.from_solver(solver).Zs(w), rtol=1e-10)
+
+
+def test_diffuse_absorption(eqf_stack):
+    solver = eqf_stack([0.03, 0.02], [{}, {'sigma': 40000.}])
+    omega, theta = solver.Gref['syms']['omega'], solver.Gref['syms']['theta']
+    w = 2*np.pi*np.array([250., 1000., 4000.])
+
+    solver.lambdify([omega, theta], {})
+    alpha = solver.diffuse_absorption({'omega': w}, nodes=16)
+
+    # trapezoidal rule of the Paris formula on a fine grid
+    thetas = np.linspace(0, np.pi/2, 501)
+    numeric = NumericSolver.from_solver(solver)
+    Z = solver.sat_med.V['Z']
+    integrand = np.array([
+        (1-np.abs((numeric.Zs(w, th)*np.cos(th)-Z)/(numeric.Zs(w, th)*np.cos(th)+Z))**2)*np.sin(2*th)
+        for th in thetas
+    ])
+    trapezoid = np.sum((integrand[1:]+integrand[:-1])/2, axis=0)*(thetas[1]-thetas[0])
+    np.testing.assert_allclose(alpha, trapezoid, rtol=1e-5)
+
+    solver.lambdify([omega], {'theta': 0.})
+    with pytest.raises(ValueError):
+        solver.diffuse_absorption({'omega': w})
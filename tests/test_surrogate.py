@@ -0,0 +1,59 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# test_surrogate.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+import numpy as np
+import pytest
+
+from symtmm import NumericSolver
+from symtmm.surrogate import adaptive_rational
+
+
+def test_rational_function_is_not_oversampled():
+    poles = np.array([300.+50j, 2000.+400j, 7000.+900j])
+
+    def f(omega):
+        return 1+np.sum(1/(omega[:, np.newaxis]-poles), axis=1)
+
+    surrogate = adaptive_rational(f, 100., 1e4, tol=1e-10, n_init=16, batch=8)
+    # the first 16+8 points are enough: no group is sampled once the approximants agree
+    assert surrogate.nodes.size == 24
+    w = np.geomspace(100., 1e4, 5000)
+    assert np.max(np.abs(surrogate(w)-f(w))/np.abs(f(w))) < 1e-10
+
+
+@pytest.mark.parametrize('tol', [1e-4, 1e-8])
+def test_surface_impedance(eqf_stack, tol):
+    numeric = NumericSolver.from_solver(eqf_stack([0.02, 0.03], [{}, {'sigma': 50000.}]))
+    Zs = lambda omega: numeric.Zs(omega, 0.)
+    surrogate = adaptive_rational(Zs, 2*np.pi*20, 2*np.pi*2e4, tol=tol)
+
+    w = np.geomspace(2*np.pi*20, 2*np.pi*2e4, 20000)
+    error = np.max(np.abs(surrogate(w)-Zs(w))/np.abs(Zs(w)))
+    # a heuristic over the test grid, but it should not be far off
+    assert error < 10*tol and surrogate.error < 10*tol
+
+
+def test_evaluation_budget(eqf_stack):
+    numeric = NumericSolver.from_solver(eqf_stack([0.02, 0.03], [{}, {'sigma': 50000.}]))
+    with pytest.warns(UserWarning):
+        surrogate = adaptive_rational(lambda omega: numeric.Zs(omega, 0.), 2*np.pi*20, 2*np.pi*2e4, tol=1e-12,
+                                      max_evals=30)
+    assert 30 <= surrogate.nodes.size < 30+8
@@ -0,0 +1,136 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# test_sweep.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import numpy as np
+import pytest
+
+import symtmm.sweep
+import symtmm.uncertainty
+from symtmm.sweep import SweepStore, kernel_id, load_sweep, bounded_map, chunk_bounds
+
+
+def lambdified(solver):
+    omega, theta = solver.Gref['syms']['omega'], solver.Gref['syms']['theta']
+    solver.lambdify([omega, theta], {})
+    return solver
+
+
+AXES = {'theta': np.linspace(0, 1.2, 5), 'omega': np.linspace(100, 1e4, 300)}
+
+
+def reference(solver):
+    return solver.Zs_func(AXES['omega'][np.newaxis, :], AXES['theta'][:, np.newaxis])
+
+
+def test_resume(tmpdir, eqf_stack):
+    path = str(tmpdir.join('sweep.npy'))
+    solver = lambdified(eqf_stack([0.05]))
+
+    # interrupted run
+    store = SweepStore(path, AXES, 100, kernel_id(solver.Zs_source, solver.params))
+    for i_c, chunk in enumerate(solver.iter_sweep(AXES, step=store.step)):
+        store.write(*chunk)
+        if i_c == 4:
+            break
+    assert not load_sweep(path)[2]
+
+    with mock.patch.object(solver, 'iter_sweep', wraps=solver.iter_sweep) as spy:
+        solver.sweep_to_file(AXES, path)
+    assert spy.call_count == 1 and spy.call_args[1]['skip'] == set(chunk_bounds(1500, 100)[:5])
+    data, axes, complete = load_sweep(path)
+    assert complete and list(axes) == ['theta', 'omega']
+    np.testing.assert_allclose(data, reference(solver), rtol=1e-12)
+
+
+def test_other_kernel_starts_over(tmpdir, eqf_stack):
+    path = str(tmpdir.join('sweep.npy'))
+    lambdified(eqf_stack([0.05])).sweep_to_file(AXES, path)
+    solver = lambdified(eqf_stack([0.10]))
+    data = solver.sweep_to_file(AXES, path)
+    np.testing.assert_allclose(data, reference(solver), rtol=1e-12)
+
+
+def test_executor_sweep(eqf_stack):
+    solver = lambdified(eqf_stack([0.05]))
+    with ThreadPoolExecutor(3) as executor:
+        assert list(bounded_map(executor, pow, ((i, 2) for i in range(50)))) == [i**2 for i in range(50)]
+        data = solver.sweep(AXES, max_memory=2**14, executor=executor)
+    np.testing.assert_allclose(data, reference(solver), rtol=1e-12)
+
+
+def test_compiled_mode_is_kept(tmpdir, monkeypatch, eqf_stack):
+    from symtmm.uncertainty import Uniform
+
+    modes = []
+    numeric_kernel = symtmm.sweep.numeric_kernel
+
+    def spy(source, name, nb_args, backend, precision):
+        modes.append((backend, precision))
+        return numeric_kernel(source, name, nb_args, backend, precision)
+
+    monkeypatch.setattr(symtmm.sweep, 'numeric_kernel', spy)
+    monkeypatch.setattr(symtmm.uncertainty, 'numeric_kernel', spy)
+
+    solver = lambdified(eqf_stack([0.05]))
+    expected = reference(solver)
+    omega, theta = solver.Gref['syms']['omega'], solver.Gref['syms']['theta']
+
+    solver.lambdify([omega, theta], {}, precision='complex64')
+    data = solver.sweep(AXES)
+    assert data.dtype == np.complex64
+    np.testing.assert_allclose(data, expected, rtol=1e-4)
+    assert solver.sweep_to_file(AXES, str(tmpdir.join('sweep.npy'))).dtype == np.complex64
+    solver.propagate_uncertainty({'theta': Uniform(0., 1.)}, {'omega': [500., 1000.]}, 64)
+    assert set(modes) == {('numpy', 'complex64')}
+
+    del modes[:]
+    solver.lambdify([omega, theta], {}, backend='numba')
+    np.testing.assert_allclose(solver.sweep(AXES, max_memory=2**14), expected, rtol=1e-12)
+    assert set(modes) == {(solver.backend, 'complex128')}
+
+    solver.lambdify([omega, theta], {}, precision='mpmath')
+    with pytest.raises(ValueError):
+        solver.sweep(AXES)
+
+
+def test_thickness_names_are_positional(tmpdir, eqf_stack):
+    path = str(tmpdir.join('sweep.npy'))
+    axes = {'layers[1].thickness': np.linspace(0.01, 0.05, 5), 'omega': np.linspace(100, 1e4, 40)}
+
+    def compiled():
+        solver = eqf_stack([0.02, 0.03])
+        solver.lambdify([solver.Gref['syms']['omega'], solver.layers[1].thickness], {'theta': 0.})
+        return solver
+
+    solver = compiled()
+    assert [str(_) for _ in solver.params] == ['omega', 'd_1']
+    stored = solver.sweep_to_file(axes, path)
+    np.testing.assert_allclose(solver.sweep({solver.layers[1].thickness: axes['layers[1].thickness'],
+                                             'omega': axes['omega']}), stored)
+
+    # the same stack, rebuilt after other layers were created, resumes the sweep
+    eqf_stack([0.01]*3)
+    with mock.patch('symtmm.solver.evaluate_chunk') as evaluate_chunk:
+        compiled().sweep_to_file(axes, path)
+    assert not evaluate_chunk.called
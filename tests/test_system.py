@@ -0,0 +1,103 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# test_system.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+import numpy as np
+import sympy as sp
+import pytest
+
+from symtmm.system import BlockSystem
+from symtmm.utils import LRUCache
+
+
+def determinant_ratio(A):
+    """Surface impedance by the ratio of determinants (Allard & Atalla, 2009, eq. 11.88)"""
+    D1, D2 = A.copy(), A.copy()
+    D1.col_del(0)
+    D2.col_del(1)
+    return -D1.det()/D2.det()
+
+
+@pytest.mark.parametrize('thicknesses', [[0.05], [0.02, 0.03], [0.01, 0.04, 0.02]])
+def test_sweep_matches_determinants(eqf_stack, thicknesses):
+    solver = eqf_stack(thicknesses, [{'sigma': 10000.*(1+i_L)} for i_L in range(len(thicknesses))])
+    omega, theta = solver.Gref['syms']['omega'], solver.Gref['syms']['theta']
+    solver.bootstrap([omega, theta], {})
+    solver._extract_Zs()
+
+    assert solver.A.shape == solver.system.shape == (2*len(thicknesses)+1, 2*len(thicknesses)+2)
+    A_func = sp.lambdify([omega, theta], solver.A, 'numpy')
+    Zs_func = sp.lambdify([omega, theta], solver.Zs, 'numpy')
+    for w, t in [(2*np.pi*100, 0.), (2*np.pi*1000, 0.4), (2*np.pi*5000, 1.2)]:
+        A = np.array(A_func(w, t), dtype=complex)
+        expected = -np.linalg.det(np.delete(A, 0, axis=1))/np.linalg.det(np.delete(A, 1, axis=1))
+        assert np.isclose(Zs_func(w, t), expected, rtol=1e-9)
+
+
+def random_matrix(rand, rows, cols):
+    while True:
+        M = sp.Matrix(rand.randint(-5, 6, size=(rows, cols)))
+        if rows != cols or M.det() != 0:
+            return M
+
+
+@pytest.mark.parametrize('nb_layers', [1, 2, 3])
+def test_non_identity_interfaces(nb_layers):
+    rand = np.random.RandomState(nb_layers)
+    system = BlockSystem([2]*(nb_layers+1))
+    for k in range(nb_layers):
+        system.add_row({k: random_matrix(rand, 2, 2), k+1: random_matrix(rand, 2, 2)}, key=k)
+    system.add_row({nb_layers: sp.Matrix([[0, 1]])}, key='backing')
+
+    memo = LRUCache()
+    S = system.sweep(memo=memo)
+    assert S.shape == (2, 1)
+    assert S[0, 0]/S[1, 0] == determinant_ratio(system.to_dense())
+    # the partial eliminations are reused
+    assert all(tuple(system.row_keys[k:]) in memo for k in range(nb_layers+1))
+    assert system.sweep(memo=memo) is S
+
+
+def test_invalid_systems():
+    system = BlockSystem([2, 2])
+    with pytest.raises(ValueError):
+        system.add_row({0: sp.eye(2), 1: sp.ones(1, 2)})
+    with pytest.raises(ValueError):
+        system.add_row({0: sp.eye(2), 1: sp.eye(3)})
+
+    # the backing must only constrain the last state vector
+    system.add_row({0: sp.eye(2), 1: sp.eye(2)})
+    system.add_row({0: sp.Matrix([[1, 0]]), 1: sp.Matrix([[0, 1]])})
+    with pytest.raises(ValueError):
+        system.sweep()
+
+    # rows must couple consecutive state vectors
+    system = BlockSystem([2, 2, 2])
+    system.add_row({0: sp.eye(2), 2: sp.eye(2)})
+    system.add_row({1: sp.eye(2), 2: sp.eye(2)})
+    system.add_row({2: sp.Matrix([[0, 1]])})
+    with pytest.raises(ValueError):
+        system.sweep()
+
+    system = BlockSystem([2, 2])
+    system.add_row({0: sp.Matrix([[1, 0]]), 1: sp.Matrix([[0, 1]])})
+    system.add_row({1: sp.Matrix([[0, 1]])})
+    with pytest.raises(NotImplementedError):
+        system.sweep()
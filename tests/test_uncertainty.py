@@ -0,0 +1,81 @@
+#! /usr/bin/env python
+# -*- coding:utf8 -*-
+#
+# test_uncertainty.py
+#
+# This file is part of symtmm, a software distributed under the MIT license.
+# For any question, please contact the author below.
+#
+# Copyright (c) 2017 Mathieu Gaborit <gaborit@kth.se>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from symtmm.uncertainty import sobol, latin_hypercube, propagate, Uniform, Normal
+
+
+LINEAR = 'def Zs(a, b, w):\n    return a+2*b+w\n'
+
+
+def real(Zs):
+    return Zs.real
+
+
+def test_sobol_points():
+    np.testing.assert_allclose(sobol(0, 4, 2)[1:], [[0.5, 0.5], [0.75, 0.25], [0.25, 0.75]], atol=1e-9)
+    # any range of the sequence can be generated on its own
+    np.testing.assert_array_equal(sobol(0, 64, 6, seed=3), np.vstack([sobol(0, 20, 6, 3), sobol(20, 64, 6, 3)]))
+    # the first 2^k points are stratified along every dimension
+    u = sobol(0, 256, 21, seed=1)
+    for column in u.T:
+        np.testing.assert_array_equal(np.sort(np.floor(column*256)), np.arange(256))
+
+    with pytest.raises(ValueError):
+        sobol(0, 4, 22)
+
+
+def test_latin_hypercube():
+    u = latin_hypercube(100, 3, seed=2)
+    for column in u.T:
+        np.testing.assert_array_equal(np.sort(np.floor(column*100)), np.arange(100))
+
+
+@pytest.mark.parametrize('method', ['sobol', 'lhs', 'random'])
+def test_propagate_moments(method):
+    w = np.array([0., 10.])
+    distributions = {'a': Uniform(0., 1.), 'b': Normal(1., 0.5)}
+    result = propagate(LINEAR, ['a', 'b', 'w'], distributions, {'w': w}, 8192, method=method, quantity=real,
+                       chunk=1000, bounds=(-5., 20.))
+    assert result.n_samples == 8192
+    np.testing.assert_allclose(result.mean, 2.5+w, rtol=1e-2)
+    np.testing.assert_allclose(result.variance, 1/12+1., rtol=5e-2)
+    np.testing.assert_allclose(result.quantile(0.5), 2.5+w, atol=0.05)
+
+    # chunks are independent from where they are evaluated
+    with ThreadPoolExecutor(2) as executor:
+        parallel = propagate(LINEAR, ['a', 'b', 'w'], distributions, {'w': w}, 8192, method=method, quantity=real,
+                             chunk=1000, executor=executor)
+    if method != 'random':
+        np.testing.assert_allclose(parallel.mean, result.mean, rtol=1e-12)
+
+
+def test_sensitivity_indices():
+    distributions = {'a': Uniform(0., 1.), 'b': Normal(1., 0.5)}
+    result = propagate(LINEAR, ['a', 'b', 'w'], distributions, {'w': 0.}, 4096, quantity=real, sensitivity=True)
+    # additive model: first and total order indices are the variance shares
+    expected = np.array([1/12, 1.])/(1/12+1.)
+    np.testing.assert_allclose(result.first_order, expected, atol=0.02)
+    np.testing.assert_allclose(result.total_order, expected, atol=0.02)